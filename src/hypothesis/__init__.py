@@ -26,7 +26,7 @@ failing examples it finds.
 from hypothesis._settings import settings, Verbosity, Phase, HealthCheck
 from hypothesis.version import __version_info__, __version__
 from hypothesis.control import assume, note, reject
-from hypothesis.core import given, find, example, seed
+from hypothesis.core import given, find, example, seed, batched
 
 
 __all__ = [
@@ -37,6 +37,7 @@ __all__ = [
     'assume',
     'reject',
     'seed',
+    'batched',
     'given',
     'find',
     'example',
@@ -32,6 +32,7 @@ from collections import namedtuple
 
 from hypothesis.errors import InvalidArgument, HypothesisDeprecationWarning
 from hypothesis.configuration import hypothesis_home_dir
+from hypothesis.internal.compat import integer_types
 from hypothesis.utils.conventions import not_set
 from hypothesis.utils.dynamicvariables import DynamicVariable
 
@@ -388,6 +389,52 @@ your tests slower.
 )
 
 
+def _worker_count_validator(name):
+    def validate(count):
+        if isinstance(count, bool) or not isinstance(count, integer_types):
+            raise InvalidArgument(
+                '%s=%r must be an integer' % (name, count))
+        if count < 1:
+            raise InvalidArgument(
+                '%s=%r must be at least 1' % (name, count))
+        return count
+    return validate
+
+
+settings.define_setting(
+    'generate_processes',
+    default=1,
+    description="""
+If this is greater than one, Hypothesis will generate examples in this many
+forked worker processes at once, stopping all of them as soon as one finds a
+failing example, which is then shrunk in the main process as normal. The
+max_examples and max_iterations limits apply to the workers' combined total.
+This is only worth doing for tests that are slow to run, and has no effect on
+platforms without os.fork.
+""",
+    validator=_worker_count_validator('generate_processes'),
+)
+
+
+settings.define_setting(
+    'generate_threads',
+    default=1,
+    description="""
+If this is greater than one, Hypothesis will generate examples in batches of
+this many and run each batch on a pool of this many threads, which can make
+tests that spend most of their time waiting on I/O much faster. The test must
+be safe to call from several threads at once. Each example draws its data from
+its own random number generator and the results are considered in the order
+the examples were started, so a run is still reproducible from its seed.
+Shrinking and the reported example run one at a time in the main thread, and
+so does generating when coverage_guided or isolate_examples is set, or there is
+a deadline or memory_limit. This has no effect for async tests, which use
+concurrent_examples instead, or on Pythons without concurrent.futures.
+""",
+    validator=_worker_count_validator('generate_threads'),
+)
+
+
 settings.define_setting(
     'max_shrinks',
     default=500,
@@ -398,6 +445,145 @@ shrink the example.
 """
 )
 
+
+def _validate_max_shrink_calls(calls):
+    if calls is None:
+        return calls
+    if isinstance(calls, bool) or not isinstance(calls, integer_types):
+        raise InvalidArgument(
+            'max_shrink_calls=%r must be an integer or None' % (calls,))
+    if calls <= 0:
+        raise InvalidArgument(
+            'max_shrink_calls=%r must be positive' % (calls,))
+    return calls
+
+
+settings.define_setting(
+    'max_shrink_calls',
+    default=None,
+    description="""
+If set, the most times Hypothesis will call the test function while shrinking
+a failing example. Unlike max_shrinks this counts every call, not just the
+ones that made the example smaller, so it also bounds time spent on shrinks
+that don't work. When it runs out the smallest failing example found so far
+is reported, along with a note that shrinking was cut short. If this is None
+then the number of calls is not limited.
+""",
+    validator=_validate_max_shrink_calls,
+)
+
+
+def _validate_shrink_time_limit(limit):
+    if limit is None:
+        return limit
+    if isinstance(limit, bool) or not isinstance(
+        limit, integer_types + (float,)
+    ):
+        raise InvalidArgument(
+            'shrink_time_limit=%r must be a number of seconds or None' % (
+                limit,))
+    if limit <= 0:
+        raise InvalidArgument(
+            'shrink_time_limit=%r must be positive' % (limit,))
+    return limit
+
+
+settings.define_setting(
+    'shrink_time_limit',
+    default=None,
+    description="""
+If set, the most seconds Hypothesis will spend shrinking a failing example,
+separately from the overall timeout. As with timeout this is a soft limit
+that is checked between calls to the test function. When it runs out the
+smallest failing example found so far is reported, along with a note that
+shrinking was cut short. If this is None then shrinking is only limited by
+max_shrinks, max_shrink_calls and timeout.
+""",
+    validator=_validate_shrink_time_limit,
+)
+
+settings.define_setting(
+    'shrink_processes',
+    default=1,
+    description="""
+If this is greater than one, Hypothesis will evaluate independent shrink
+candidates for a failing example in this many forked worker processes at once,
+keeping the best of them that still fails. This can make shrinking much faster
+for tests that are slow to run, and has no effect on platforms without
+os.fork.
+""",
+    validator=_worker_count_validator('shrink_processes'),
+)
+
+settings.define_setting(
+    'concurrent_examples',
+    default=1,
+    description="""
+If this is greater than one and the test is an async def coroutine function,
+Hypothesis will run up to this many examples at once on the test's event loop
+while generating examples, which can make tests that spend most of their time
+waiting on I/O much faster. Each example still draws its arguments one at a
+time. Shrinking and the reported example run one example at a time as normal,
+and so does generating when coverage_guided or isolate_examples is set, or
+there is a deadline or memory_limit.
+""",
+    validator=_worker_count_validator('concurrent_examples'),
+)
+
+settings.define_setting(
+    'isolate_examples',
+    default=False,
+    description="""
+If set to True, Hypothesis will run each example in a child process forked from
+the one running the test, so any state the test sets up before it starts is
+shared copy-on-write, and nothing an example does to global state, or leaks,
+can affect the examples that come after it. An example that crashes the
+process it runs in is reported as an error rather than taking the test run
+down with it. Each example costs a fork, so this is only worth doing for tests
+that would otherwise need expensive setup and teardown for every example. The
+failing example that is reported is replayed in the main process as usual.
+This has no effect on platforms without os.fork.
+"""
+)
+
+settings.define_setting(
+    'coverage_guided',
+    default=False,
+    description="""
+If set to True, Hypothesis will record which lines of code each example
+executes and keep the examples that reached code no previous example did,
+preferring to build new examples out of those. This can find bugs that only
+show up deep inside complicated code in far fewer examples, at the cost of
+making each example slower to run. It replaces any trace function (e.g. from
+coverage measurement) while the test is running.
+
+If there is an example database, up to 100 of these examples are saved in it
+and used as the starting point for the next run of the test.
+"""
+)
+
+settings.define_setting(
+    'cache_outcomes',
+    default=False,
+    description="""
+If set to True, Hypothesis will remember which of the examples saved in the
+database it has already seen pass, and not run them again on later runs until
+the source of the test changes. This can make rerunning slow tests much
+faster, but only do it for tests whose outcome depends only on their own
+source: Changes to the code they call will not cause examples to be rerun.
+"""
+)
+
+settings.define_setting(
+    'record_statistics',
+    default=False,
+    description="""
+If set to True, Hypothesis will write statistics about each run of a test,
+including how many test calls and how much time each shrink pass used, as JSON
+to the statistics directory in the Hypothesis storage directory.
+"""
+)
+
 settings.define_setting(
     'timeout',
     default=60,
@@ -410,6 +596,69 @@ applied.
 """
 )
 
+
+def _validate_deadline(deadline):
+    if deadline is None:
+        return deadline
+    if isinstance(deadline, bool) or not isinstance(
+        deadline, integer_types + (float,)
+    ):
+        raise InvalidArgument(
+            'deadline=%r must be a number of milliseconds or None' % (
+                deadline,))
+    if deadline <= 0:
+        raise InvalidArgument(
+            'deadline=%r must be positive' % (deadline,))
+    return deadline
+
+
+settings.define_setting(
+    'deadline',
+    default=None,
+    description="""
+If set, the maximum number of milliseconds that a single example may take to
+run. Unlike timeout this is a hard limit: An example that runs for longer is
+interrupted and counts as a failure with a DeadlineExceeded error, which is
+then shrunk like any other to find the smallest input that is that slow. If
+this is None then no deadline will be applied.
+
+The deadline is only enforced on platforms with SIGALRM and when the test is
+run in the main thread.
+""",
+    validator=_validate_deadline,
+)
+
+
+def _validate_memory_limit(limit):
+    if limit is None:
+        return limit
+    if isinstance(limit, bool) or not isinstance(limit, integer_types):
+        raise InvalidArgument(
+            'memory_limit=%r must be a number of bytes or None' % (limit,))
+    if limit <= 0:
+        raise InvalidArgument(
+            'memory_limit=%r must be positive' % (limit,))
+    return limit
+
+
+settings.define_setting(
+    'memory_limit',
+    default=None,
+    description="""
+If set, the most memory in bytes that a single example may allocate. An
+example whose allocations peak at more than this counts as a failure with a
+MemoryLimitExceeded error, which is then shrunk like any other to find the
+smallest input that uses that much memory. If this is None then no limit will
+be applied.
+
+Memory is measured with tracemalloc, so only allocations made through
+Python's allocators count, the example is only checked once it has finished,
+and examples run noticeably slower while a limit is set. The limit is not
+applied on Pythons without tracemalloc.
+""",
+    validator=_validate_memory_limit,
+)
+
 settings.define_setting(
     'derandomize',
     default=False,
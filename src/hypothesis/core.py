@@ -19,16 +19,19 @@
 
 from __future__ import division, print_function, absolute_import
 
+import sys
 import time
 import inspect
+import operator
 import functools
 import traceback
 from random import getstate as getglobalrandomstate
 from random import Random
+from contextlib import contextmanager
 from collections import namedtuple
 
 from hypothesis.errors import Flaky, Timeout, NoSuchExample, \
-    Unsatisfiable, InvalidArgument, FailedHealthCheck, \
+    ExampleFailed, Unsatisfiable, InvalidArgument, FailedHealthCheck, \
     UnsatisfiedAssumption, HypothesisDeprecationWarning
 from hypothesis.control import BuildContext
 from hypothesis._settings import settings as Settings
@@ -37,9 +40,13 @@ from hypothesis.executors import new_style_executor, \
     default_new_style_executor
 from hypothesis.reporting import report, verbose_report, current_verbosity
 from hypothesis.internal.compat import getargspec, str_to_bytes
-from hypothesis.internal.reflection import nicerepr, arg_string, \
-    impersonate, copy_argspec, function_digest, fully_qualified_name, \
-    convert_positional_arguments, get_pretty_function_description
+from hypothesis.internal.memory import memory_limit
+from hypothesis.internal.coroutines import EventLoop, iscoroutinefunction
+from hypothesis.internal.deadline import deadline
+from hypothesis.internal.reflection import proxies, nicerepr, \
+    arg_string, impersonate, copy_argspec, function_digest, \
+    fully_qualified_name, convert_positional_arguments, \
+    get_pretty_function_description
 from hypothesis.searchstrategy.strategies import SearchStrategy
 
 
@@ -87,7 +94,14 @@ def reify_and_execute(
     search_strategy, test,
     print_example=False,
     is_final=False,
+    settings=None,
 ):
+    if settings is None:
+        milliseconds = limit = None
+    else:
+        milliseconds = settings.deadline
+        limit = settings.memory_limit
+
     def run(data):
         with BuildContext(is_final=is_final):
             args, kwargs = data.draw(search_strategy)
@@ -100,7 +114,8 @@ def reify_and_execute(
                 report(
                     lambda: 'Trying example: %s(%s)' % (
                         test.__name__, arg_string(test, args, kwargs)))
-            return test(*args, **kwargs)
+            with deadline(milliseconds), memory_limit(limit):
+                return test(*args, **kwargs)
     return run
 
 
@@ -120,6 +135,80 @@ def seed(seed):
     return accept
 
 
+def batched(size):
+    """
+    batched: Have @given pass the test many examples in each call, so that it
+             can check them all at once (e.g. with vectorised NumPy
+             operations). Each argument that @given draws is passed as a list
+             of up to size values, one for each example, and the test returns
+             a collection of the indices of the examples that failed (or None
+             if none did). If the test raises an error instead, its examples
+             are rerun one at a time to find out which one failed.
+
+             Only examples that are generated are checked in batches: Explicit
+             examples, shrinking, and the reported example pass the test a
+             batch of one, as does everything when there is a deadline or
+             memory_limit. This must be applied before @given, i.e. below it.
+    """
+    if size < 1:
+        raise InvalidArgument('size=%r must be at least one' % (size,))
+
+    def accept(test):
+        if getattr(test, 'is_hypothesis_test', False):
+            raise InvalidArgument(
+                '@batched must be applied before @given, not after it')
+        test._hypothesis_internal_batch_size = size
+        return test
+    return accept
+
+
+def failed_indices(test, failed, size):
+    """Return the distinct indices, in order, of the examples that the batched
+    test test reported as failing by returning failed when given size
+    examples. Raise InvalidArgument if failed is not None or a collection of
+    such indices."""
+    if failed is None:
+        return []
+    try:
+        failed = list(failed)
+    except TypeError:
+        raise InvalidArgument((
+            '%s() returned %r, but should return a collection of the '
+            'indices of failing examples, or None') % (test.__name__, failed))
+    indices = set()
+    for i in failed:
+        try:
+            if isinstance(i, bool):
+                raise TypeError()
+            index = operator.index(i)
+        except TypeError:
+            raise InvalidArgument(
+                '%s() reported %r as failing, which is not an index' % (
+                    test.__name__, i))
+        if not 0 <= index < size:
+            raise InvalidArgument((
+                '%s() reported index %r as failing, but was only given %d '
+                'examples') % (test.__name__, i, size))
+        indices.add(index)
+    return sorted(indices)
+
+
+def run_batch_of_one(test, names):
+    """Return a function with the same signature as the batched test test
+    which runs it on a single example, with each of the arguments in names
+    passed as a list of one value, and raises ExampleFailed if it reports
+    that example as failing."""
+    @proxies(test)
+    def run(*args, **kwargs):
+        args, kwargs = convert_positional_arguments(test, args, kwargs)
+        for name in names:
+            kwargs[name] = [kwargs[name]]
+        if failed_indices(test, test(*args, **kwargs), 1):
+            raise ExampleFailed(
+                '%s() reported this example as failing' % (test.__name__,))
+    return run
+
+
 class WithRunner(SearchStrategy):
 
     def __init__(self, base, runner):
@@ -206,22 +295,28 @@ def given(*generator_arguments, **generator_kwargs):
             defaults=None
         )
 
+        if iscoroutinefunction(test):
+            # Unless the test has an executor of its own to run it, we run
+            # every example of an async test on one event loop, and the rest
+            # of the run sees a synchronous version of it.
+            event_loop = EventLoop()
+            async_test = test
+        else:
+            event_loop = None
+
+        batch_size = getattr(test, '_hypothesis_internal_batch_size', None)
+        if batch_size is not None:
+            if event_loop is not None:
+                return invalid('@batched cannot be used with async tests')
+            # Everything except generating examples runs a batch of one.
+            batch_test = test
+            test = run_batch_of_one(batch_test, list(generator_kwargs))
+
         @impersonate(test)
         @copy_argspec(
             test.__name__, argspec
         )
         def wrapped_test(*arguments, **kwargs):
-            settings = wrapped_test._hypothesis_internal_use_settings
-            if wrapped_test._hypothesis_internal_use_seed is not None:
-                random = Random(
-                    wrapped_test._hypothesis_internal_use_seed)
-            elif settings.derandomize:
-                random = Random(function_digest(test))
-            else:
-                random = new_random()
-
-            import hypothesis.strategies as sd
-
             selfy = None
             arguments, kwargs = convert_positional_arguments(
                 wrapped_test, arguments, kwargs)
@@ -235,6 +330,29 @@ def given(*generator_arguments, **generator_kwargs):
                 selfy = arguments[0]
             test_runner = new_style_executor(selfy)
 
+            if (
+                event_loop is None or
+                test_runner is not default_new_style_executor
+            ):
+                return run_wrapped_test(
+                    test, selfy, test_runner, arguments, kwargs)
+            with event_loop:
+                return run_wrapped_test(
+                    event_loop.synchronous(test), selfy, test_runner,
+                    arguments, kwargs)
+
+        def run_wrapped_test(test, selfy, test_runner, arguments, kwargs):
+            settings = wrapped_test._hypothesis_internal_use_settings
+            if wrapped_test._hypothesis_internal_use_seed is not None:
+                random = Random(
+                    wrapped_test._hypothesis_internal_use_seed)
+            elif settings.derandomize:
+                random = Random(function_digest(test))
+            else:
+                random = new_random()
+
+            import hypothesis.strategies as sd
+
             for example in reversed(getattr(
                 wrapped_test, 'hypothesis_explicit_examples', ()
             )):
@@ -438,33 +556,17 @@ def given(*generator_arguments, **generator_kwargs):
             repr_for_last_exception = [None]
             performed_random_check = [False]
 
-            def evaluate_test_data(data):
+            @contextmanager
+            def checking_global_random():
+                # Only the first test run checks, as that's enough to find
+                # out whether the test uses the global random module.
                 if perform_health_check and not performed_random_check[0]:
                     initial_state = getglobalrandomstate()
                     performed_random_check[0] = True
                 else:
                     initial_state = None
                 try:
-                    result = test_runner(data, reify_and_execute(
-                        search_strategy, test,
-                    ))
-                    if result is not None and settings.perform_health_check:
-                        fail_health_check((
-                            'Tests run under @given should return None, but '
-                            '%s returned %r instead.'
-                        ) % (test.__name__, result), HealthCheck.return_value)
-                    return False
-                except UnsatisfiedAssumption:
-                    data.mark_invalid()
-                except (
-                    HypothesisDeprecationWarning, FailedHealthCheck,
-                    StopTest,
-                ):
-                    raise
-                except Exception:
-                    last_exception[0] = traceback.format_exc()
-                    verbose_report(last_exception[0])
-                    data.mark_interesting()
+                    yield
                 finally:
                     if (
                         initial_state is not None and
@@ -480,8 +582,145 @@ def given(*generator_arguments, **generator_kwargs):
                             HealthCheck.random_module,
                         )
 
+            def check_return_value(result):
+                if result is not None and settings.perform_health_check:
+                    fail_health_check((
+                        'Tests run under @given should return None, but '
+                        '%s returned %r instead.'
+                    ) % (test.__name__, result), HealthCheck.return_value)
+
+            def handle_error(data):
+                # Called from an except block to record the exception being
+                # handled as the outcome of data, or reraise it if it isn't
+                # a failure of the test.
+                e = sys.exc_info()[1]
+                if isinstance(e, UnsatisfiedAssumption):
+                    data.mark_invalid()
+                if isinstance(e, (
+                    HypothesisDeprecationWarning, FailedHealthCheck,
+                    StopTest,
+                )) or not isinstance(e, Exception):
+                    raise
+                last_exception[0] = traceback.format_exc()
+                verbose_report(last_exception[0])
+                data.mark_interesting()
+
+            def report_trying(args, kwargs):
+                if current_verbosity() >= Verbosity.verbose:
+                    report(
+                        lambda: 'Trying example: %s(%s)' % (
+                            test.__name__, arg_string(test, args, kwargs)))
+
+            def evaluate_test_data(data):
+                with checking_global_random():
+                    try:
+                        result = test_runner(data, reify_and_execute(
+                            search_strategy, test, settings=settings,
+                        ))
+                        check_return_value(result)
+                        return False
+                    except BaseException:
+                        handle_error(data)
+
+            def evaluate_test_data_concurrently(datas):
+                # Each example draws its arguments in turn, then all of their
+                # coroutines run on the event loop together. We only do this
+                # while generating, so the notes and cleanups of the whole
+                # batch share one build context. The runner doesn't run
+                # examples together when there's a deadline or memory limit,
+                # which apply to each example on its own, so neither this nor
+                # evaluate_test_data_batch has to enforce them.
+                started = []
+                with BuildContext(), checking_global_random():
+                    for data in datas:
+                        try:
+                            try:
+                                args, kwargs = data.draw(search_strategy)
+                            except BaseException:
+                                handle_error(data)
+                            report_trying(args, kwargs)
+                            started.append((data, async_test(*args, **kwargs)))
+                        except StopTest:
+                            pass
+                    results = event_loop.run_concurrently(
+                        [coroutine for _, coroutine in started])
+                    for (data, _), result in zip(started, results):
+                        try:
+                            try:
+                                if isinstance(result, BaseException):
+                                    raise result
+                                check_return_value(result)
+                            except BaseException:
+                                handle_error(data)
+                        except StopTest:
+                            pass
+
+            def evaluate_test_data_batch(datas):
+                # Each example draws its arguments in turn, then the test
+                # checks all of them in a single call, in a single build
+                # context.
+                drawn = []
+                with BuildContext(), checking_global_random():
+                    for data in datas:
+                        try:
+                            try:
+                                example = data.draw(search_strategy)
+                            except BaseException:
+                                handle_error(data)
+                            report_trying(*example)
+                            drawn.append((data, example))
+                        except StopTest:
+                            pass
+                    if not drawn:
+                        return
+                    args, kwargs = drawn[0][1]
+                    kwargs = dict(kwargs)
+                    for name in generator_kwargs:
+                        kwargs[name] = [
+                            example_kwargs[name]
+                            for _, (_, example_kwargs) in drawn
+                        ]
+                    try:
+                        failed = batch_test(*args, **kwargs)
+                    except Exception:
+                        # We can't tell which example this came from, so
+                        # check them one at a time.
+                        failed = None
+                        for data, (args, kwargs) in drawn:
+                            try:
+                                try:
+                                    test(*args, **kwargs)
+                                except BaseException:
+                                    handle_error(data)
+                            except StopTest:
+                                pass
+                    for i in failed_indices(batch_test, failed, len(drawn)):
+                        data = drawn[i][0]
+                        try:
+                            try:
+                                raise ExampleFailed(
+                                    '%s() reported example %d in a batch as '
+                                    'failing' % (batch_test.__name__, i))
+                            except ExampleFailed:
+                                handle_error(data)
+                        except StopTest:
+                            pass
+
             from hypothesis.internal.conjecture.engine import TestRunner
 
+            if test_runner is not default_new_style_executor:
+                concurrent_test_function = None
+                concurrency = 1
+            elif event_loop is not None:
+                concurrent_test_function = evaluate_test_data_concurrently
+                concurrency = settings.concurrent_examples
+            elif batch_size is not None:
+                concurrent_test_function = evaluate_test_data_batch
+                concurrency = batch_size
+            else:
+                concurrent_test_function = None
+                concurrency = 1
+
             falsifying_example = None
             database_key = str_to_bytes(fully_qualified_name(test))
             start_time = time.time()
@@ -489,6 +728,11 @@ def given(*generator_arguments, **generator_kwargs):
                 evaluate_test_data,
                 settings=settings, random=random,
                 database_key=database_key,
+                test_digest=(
+                    function_digest(test) if settings.cache_outcomes
+                    else None),
+                concurrent_test_function=concurrent_test_function,
+                concurrency=concurrency,
             )
             runner.run()
             run_time = time.time() - start_time
@@ -504,6 +748,12 @@ def given(*generator_arguments, **generator_kwargs):
                     settings.database.save(
                         database_key, falsifying_example
                     )
+                if runner.shrink_cut_short:
+                    report(
+                        'Shrinking was cut short by max_shrink_calls or '
+                        'shrink_time_limit, so this is the smallest failing '
+                        'example found so far rather than a fully shrunk one.'
+                    )
             else:
                 if runner.valid_examples < min(
                     settings.min_satisfying_examples,
@@ -537,7 +787,8 @@ def given(*generator_arguments, **generator_kwargs):
                         TestData.for_buffer(falsifying_example),
                         reify_and_execute(
                             search_strategy, test,
-                            print_example=True, is_final=True
+                            print_example=True, is_final=True,
+                            settings=settings,
                         ))
             except (UnsatisfiedAssumption, StopTest):
                 report(traceback.format_exc())
@@ -566,7 +817,8 @@ def given(*generator_arguments, **generator_kwargs):
                     reify_and_execute(
                         search_strategy,
                         test_is_flaky(test, repr_for_last_exception[0]),
-                        print_example=True, is_final=True
+                        print_example=True, is_final=True,
+                        settings=settings,
                     ))
             except (UnsatisfiedAssumption, StopTest):
                 raise Flaky(filter_message)
@@ -642,7 +894,8 @@ def find(specifier, condition, settings=None, random=None, database_key=None):
     start = time.time()
     runner = TestRunner(
         template_condition, settings=settings, random=random,
-        database_key=database_key,
+        database_key=database_key, test_digest=(
+            function_digest(condition) if settings.cache_outcomes else None),
     )
     runner.run()
     run_time = time.time() - start
@@ -143,6 +143,24 @@ class InvalidArgument(HypothesisException, TypeError):
     some manner incorrect."""
 
 
+class DeadlineExceeded(HypothesisException):
+
+    """Raised when an example takes longer to run than the deadline setting
+    allows."""
+
+
+class MemoryLimitExceeded(HypothesisException):
+
+    """Raised when an example allocates more memory than the memory_limit
+    setting allows."""
+
+
+class ExampleFailed(HypothesisException, AssertionError):
+
+    """Raised when a test decorated with @batched reports that an example it
+    was given failed."""
+
+
 class InvalidState(HypothesisException):
 
     """The system is not in a state where you were allowed to do that."""
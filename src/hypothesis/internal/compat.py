@@ -72,6 +72,15 @@ else:
         return Decimal(f)
 
 
+if PY26:
+    def buffer_view(buffer):
+        """Python 2.6 has no memoryview, so slices of the view are copied
+        from buffer itself."""
+        return buffer
+else:
+    buffer_view = memoryview
+
+
 if PY3:
     def str_to_bytes(s):
         return s.encode(a_good_encoding())
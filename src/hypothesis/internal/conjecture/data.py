@@ -16,11 +16,13 @@
 
 from __future__ import division, print_function, absolute_import
 
+from array import array
+
 from enum import IntEnum
 
 from hypothesis.errors import Frozen, InvalidArgument
-from hypothesis.internal.compat import hbytes, text_type, int_to_bytes, \
-    unicode_safe_repr, reasonable_byte_type
+from hypothesis.internal.compat import hbytes, hrange, text_type, \
+    buffer_view, int_to_bytes, unicode_safe_repr, reasonable_byte_type
 
 
 def uniform(random, n):
@@ -43,15 +45,68 @@ class StopTest(BaseException):
 global_test_counter = 0
 
 
+class Intervals(object):
+    """A read only sequence of (start, end) pairs, stored packed into a flat
+    array of unsigned ints rather than as a list of tuples so that examples
+    with many draws don't cost us many small objects."""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values) // 2
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in hrange(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not (0 <= i < len(self)):
+            raise IndexError('Interval index out of range')
+        return (self.values[2 * i], self.values[2 * i + 1])
+
+    def __iter__(self):
+        values = self.values
+        for i in hrange(0, len(values), 2):
+            yield (values[i], values[i + 1])
+
+    def __repr__(self):
+        return 'Intervals(%r)' % (list(self),)
+
+
+def _replay(data, n, distribution):
+    return data._view[data.index:data.index + n]
+
+
 class TestData(object):
 
+    __slots__ = (
+        'max_length', 'is_find', '_draw_bytes', 'overdraw', 'level',
+        'index', '_buffer', '_source', '_view', 'output', 'status', 'frozen',
+        'interval_stack',
+        'block_ends', 'example_boundaries', 'testcounter',
+        '_blocks', '_block_starts', '_block_starts_count', '_intervals',
+        '_intervals_by_level',
+        # Strategies may stash state for the duration of a test here.
+        'hypothesis_runner', 'hypothesis_shared_data_strategy',
+        '_hypothesis_shared_strategies',
+    )
+
     @classmethod
     def for_buffer(self, buffer):
-        return TestData(
-            max_length=len(buffer),
-            draw_bytes=lambda data, n, distribution:
-            buffer[data.index:data.index + n]
-        )
+        """A TestData that replays buffer.
+
+        Draws are read from a memoryview of buffer where we have one, and
+        rather than building up a copy of it as we go the data's buffer is
+        sliced from the original once the test is done.
+        """
+        data = TestData(max_length=len(buffer), draw_bytes=_replay)
+        data._buffer = None
+        data._source = buffer
+        data._view = buffer_view(buffer)
+        return data
 
     def __init__(self, max_length, draw_bytes):
         self.max_length = max_length
@@ -59,15 +114,26 @@ class TestData(object):
         self._draw_bytes = draw_bytes
         self.overdraw = 0
         self.level = 0
-        self.block_starts = {}
-        self.blocks = []
-        self.buffer = bytearray()
+        self.index = 0
+        self._buffer = bytearray()
+        self._source = None
+        self._view = None
         self.output = u''
         self.status = Status.VALID
         self.frozen = False
-        self.intervals_by_level = []
-        self.intervals = []
         self.interval_stack = []
+        # We only record where each block ended and, for each non-empty
+        # example, a flat run of (start, end, level) in the order they
+        # finished. The blocks and intervals the shrinker and mutator work
+        # with are derived from these when asked for, because most examples
+        # we generate are never looked at again.
+        self.block_ends = array('I')
+        self.example_boundaries = array('I')
+        self._blocks = None
+        self._block_starts = {}
+        self._block_starts_count = 0
+        self._intervals = None
+        self._intervals_by_level = None
         global global_test_counter
         self.testcounter = global_test_counter
         global_test_counter += 1
@@ -79,8 +145,10 @@ class TestData(object):
                     name,))
 
     @property
-    def index(self):
-        return len(self.buffer)
+    def buffer(self):
+        if self._buffer is None:
+            return hbytes(self._source[:self.index])
+        return self._buffer
 
     def note(self, value):
         self.__assert_not_frozen('note')
@@ -109,32 +177,130 @@ class TestData(object):
     def stop_example(self):
         self.__assert_not_frozen('stop_example')
         self.level -= 1
-        while self.level >= len(self.intervals_by_level):
-            self.intervals_by_level.append([])
         k = self.interval_stack.pop()
         if k != self.index:
-            t = (k, self.index)
-            self.intervals_by_level[self.level].append(t)
-            if not self.intervals or self.intervals[-1] != t:
-                self.intervals.append(t)
+            self.example_boundaries.extend((k, self.index, self.level))
+
+    @property
+    def blocks(self):
+        """The (start, end) of each block drawn, in the order they were
+        drawn."""
+        if self._blocks is not None:
+            return self._blocks
+        values = array('I')
+        start = 0
+        for end in self.block_ends:
+            values.append(start)
+            values.append(end)
+            start = end
+        blocks = Intervals(values)
+        if self.frozen:
+            self._blocks = blocks
+        return blocks
+
+    @property
+    def block_starts(self):
+        """A dict mapping each size of block drawn to a list of the starts of
+        the blocks of that size.
+
+        This is used while drawing, so rather than recomputing it we bring it
+        up to date with the blocks drawn since it was last asked for.
+        """
+        starts = self._block_starts
+        i = self._block_starts_count
+        start = self.block_ends[i - 1] if i > 0 else 0
+        while i < len(self.block_ends):
+            end = self.block_ends[i]
+            try:
+                starts[end - start].append(start)
+            except KeyError:
+                starts[end - start] = array('I', (start,))
+            start = end
+            i += 1
+        self._block_starts_count = i
+        return starts
+
+    @property
+    def intervals_by_level(self):
+        """For each level of nesting, the (start, end) of every non-empty
+        example at that level, in the order they finished."""
+        if self._intervals_by_level is not None:
+            return self._intervals_by_level
+        levels = []
+        boundaries = self.example_boundaries
+        for i in hrange(0, len(boundaries), 3):
+            level = boundaries[i + 2]
+            while level >= len(levels):
+                levels.append(Intervals(array('I')))
+            levels[level].values.extend(boundaries[i:i + 2])
+        if self.frozen:
+            self._intervals_by_level = levels
+        return levels
+
+    @property
+    def intervals(self):
+        """Every block and non-empty example, together with each pair of
+        adjacent examples at the same level, as (start, end) pairs.
+
+        Intervals are sorted as longest first, then by interval start.
+        """
+        if self._intervals is not None:
+            return self._intervals
+        ends = self.block_ends
+        intervals = set(zip([0] + ends[:-1].tolist(), ends))
+        for l in self.intervals_by_level:
+            starts = l.values[::2]
+            ends = l.values[1::2]
+            intervals.update(zip(starts, ends))
+            for i in hrange(len(starts) - 1):
+                if ends[i] == starts[i + 1]:
+                    intervals.add((starts[i], ends[i + 1]))
+        values = array('I')
+        for u, v in sorted(
+            intervals,
+            key=lambda se: (se[0] - se[1], se[0])
+        ):
+            values.append(u)
+            values.append(v)
+        intervals = Intervals(values)
+        if self.frozen:
+            self._intervals = intervals
+        return intervals
 
     def freeze(self):
         if self.frozen:
             assert isinstance(self.buffer, hbytes)
             return
         self.frozen = True
-        # Intervals are sorted as longest first, then by interval start.
-        for l in self.intervals_by_level:
-            for i in range(len(l) - 1):
-                if l[i][1] == l[i + 1][0]:
-                    self.intervals.append((l[i][0], l[i + 1][1]))
-        self.intervals = sorted(
-            set(self.intervals),
-            key=lambda se: (se[0] - se[1], se[0])
-        )
-        self.buffer = hbytes(self.buffer)
+        self._buffer = hbytes(self.buffer)
+        self._source = None
+        self._view = None
         del self._draw_bytes
 
+    def results(self):
+        """Everything that running the test on this frozen TestData
+        determined about it, in a form that can be pickled and passed to
+        adopt_results on a TestData in another process."""
+        assert self.frozen
+        return (
+            self.status, self.buffer, self.output, self.overdraw,
+            self.block_ends, self.example_boundaries,
+        )
+
+    def adopt_results(self, results):
+        """Freeze this TestData as if the test had run on it with the outcome
+        described by results, which came from results() on a copy of it."""
+        self.__assert_not_frozen('adopt_results')
+        (
+            self.status, buffer, self.output, self.overdraw,
+            self.block_ends, self.example_boundaries,
+        ) = results
+        self.index = len(buffer)
+        self._buffer = hbytes(buffer)
+        self.interval_stack = []
+        self.level = 0
+        self.freeze()
+
     def draw_bytes(self, n, distribution=uniform):
         if n == 0:
             return hbytes(b'')
@@ -146,12 +312,12 @@ class TestData(object):
             self.freeze()
             raise StopTest(self.testcounter)
         result = self._draw_bytes(self, n, distribution)
-        self.block_starts.setdefault(n, []).append(initial)
-        self.blocks.append((initial, initial + n))
         assert len(result) == n
         assert self.index == initial
-        self.buffer.extend(result)
-        self.intervals.append((initial, self.index))
+        if self._buffer is not None:
+            self._buffer.extend(result)
+        self.index += n
+        self.block_ends.append(self.index)
         return reasonable_byte_type(result)
 
     def mark_interesting(self):
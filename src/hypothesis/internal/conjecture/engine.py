@@ -18,14 +18,53 @@ from __future__ import division, print_function, absolute_import
 
 import time
 from random import Random, getrandbits
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    from concurrent.futures import ThreadPoolExecutor, wait
+except ImportError:  # pragma: no cover
+    ThreadPoolExecutor = None
 
 from hypothesis import settings as Settings
 from hypothesis import Phase
+from hypothesis.errors import AbnormalExit
 from hypothesis.reporting import debug_report
-from hypothesis.internal.compat import hbytes, hrange, Counter, \
-    text_type, bytes_from_list, to_bytes_sequence, unicode_safe_repr
-from hypothesis.internal.conjecture.data import Status, StopTest, TestData
-from hypothesis.internal.conjecture.minimizer import minimize
+from hypothesis.statistics import Statistics, PassStatistics, \
+    note_statistics, save_statistics
+from hypothesis.internal.compat import hbytes, hrange, \
+    OrderedDict, text_type, bytes_from_list, to_bytes_sequence, \
+    unicode_safe_repr
+from hypothesis.internal.conjecture.data import Status, StopTest, \
+    TestData, uniform
+from hypothesis.internal.conjecture.tree import DataTree
+from hypothesis.internal.conjecture.entropy import EntropyPool
+from hypothesis.internal.conjecture.tracer import Tracer
+from hypothesis.internal.conjecture.workers import CAN_FORK, Worker, \
+    SharedCounters, results_as_completed
+from hypothesis.internal.conjecture.minimizer import Minimizer
+
+
+# When shrinking in parallel, how many candidates to hand each worker process
+# at a time from passes that walk along the buffer.
+SHRINK_BATCH_PER_PROCESS = 4
+
+
+# How quickly a shrink pass forgets its past performance when deciding when to
+# run it, and how many times in a row it may fail before we stop running it
+# every round.
+SHRINK_PASS_DECAY = 0.5
+SHRINK_PASS_MAX_FAILURES = 2
+
+
+# The most examples from the coverage corpus that we keep in the database for
+# each test.
+COVERAGE_CORPUS_SIZE = 100
+
+
+# The most replacements for an example that replace_intervals tries from each
+# group of candidates (see ReplacementIndex).
+REPLACEMENT_ALTERNATIVES = 8
 
 
 class RunIsComplete(Exception):
@@ -36,26 +75,48 @@ class TestRunner(object):
 
     def __init__(
         self, test_function, settings=None, random=None,
-        database_key=None,
+        database_key=None, test_digest=None, concurrent_test_function=None,
+        concurrency=1,
     ):
         self._test_function = test_function
+        self._concurrent_test_function = concurrent_test_function
+        self.concurrency = concurrency
+        self._thread_pool = None
         self.settings = settings or Settings()
         self.last_data = None
         self.changed = 0
         self.shrinks = 0
+        self.minimizer_cache_hits = 0
+        self.minimizer_cache_misses = 0
         self.examples_considered = 0
         self.iterations = 0
         self.valid_examples = 0
         self.start_time = time.time()
         self.random = random or Random(getrandbits(128))
+        self.entropy = EntropyPool(self.random)
         self.database_key = database_key
+        self.test_digest = test_digest
+        self.isolate_examples = self.settings.isolate_examples and CAN_FORK
         self.seen = set()
+        self.tree = DataTree()
+        self.current_data = None
+        self.counters = None
+        self.pass_statistics = OrderedDict()
+        self.collect_coverage = False
+        self.covered = set()
+        self.coverage_corpus = []
+        self._block_index = None
+        self.shrink_start_time = None
+        self.shrink_start_iterations = 0
+        self.shrink_cut_short = False
 
     def new_buffer(self):
         self.last_data = TestData(
             max_length=self.settings.buffer_size,
-            draw_bytes=lambda data, n, distribution:
-            distribution(self.random, n)
+            draw_bytes=self.tree.avoid_dead(
+                lambda data, n, distribution:
+                self.draw_random(n, distribution)
+            )
         )
         self.test_function(self.last_data)
         self.last_data.freeze()
@@ -63,16 +124,89 @@ class TestRunner(object):
 
     def test_function(self, data):
         self.iterations += 1
+        self.current_data = data
+        arcs = None
         try:
-            self._test_function(data)
+            if self.isolate_examples:
+                arcs = self._test_function_in_child(data)
+            elif self.collect_coverage:
+                tracer = Tracer()
+                arcs = tracer.arcs
+                with tracer:
+                    self._test_function(data)
+            else:
+                self._test_function(data)
             data.freeze()
         except StopTest as e:
             if e.testcounter != data.testcounter:
                 self.save_buffer(data.buffer)
                 raise e
+        except AbnormalExit:
+            # We don't know what the example that crashed drew.
+            raise
         except:
             self.save_buffer(data.buffer)
             raise
+        self._record_result(data, arcs)
+
+    def test_functions_concurrently(self, datas):
+        """Run the test on each of datas at once, either with the concurrent
+        test function or on our thread pool, to the same effect as calling
+        test_function on each in turn."""
+        self.iterations += len(datas)
+        self.current_data = datas[-1]
+        if self._concurrent_test_function is not None:
+            self._concurrent_test_function(datas)
+        else:
+            self._test_functions_in_threads(datas)
+        for data in datas:
+            data.freeze()
+            self._record_result(data, None)
+
+    def _test_functions_in_threads(self, datas):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                self.settings.generate_threads)
+
+        def run(data):
+            # The settings in effect are per thread.
+            with self.settings:
+                try:
+                    self._test_function(data)
+                except StopTest as e:
+                    if e.testcounter != data.testcounter:
+                        raise e
+
+        futures = [self._thread_pool.submit(run, data) for data in datas]
+        wait(futures)
+        # If more than one failed, the first in order is the one we raise.
+        for future in futures:
+            future.result()
+
+    def _batch_size(self):
+        """How many examples to run at once while generating."""
+        if self.isolate_examples or self.collect_coverage:
+            return 1
+        if (
+            self.settings.deadline is not None or
+            self.settings.memory_limit is not None
+        ):
+            # These are enforced on each example separately, which only
+            # works if it has the process to itself while it runs.
+            return 1
+        if self._concurrent_test_function is not None:
+            concurrency = self.concurrency
+        elif ThreadPoolExecutor is not None:
+            concurrency = self.settings.generate_threads
+        else:
+            return 1  # pragma: no cover
+        return max(1, min(
+            concurrency,
+            self.settings.max_examples - self.valid_examples,
+            self.settings.max_iterations - self.iterations,
+        ))
+
+    def _record_result(self, data, arcs):
         if (
             data.status == Status.INTERESTING and (
                 self.last_data is None or
@@ -80,8 +214,72 @@ class TestRunner(object):
             )
         ):
             self.debug_data(data)
+        self.tree.add(data)
         if data.status >= Status.VALID:
             self.valid_examples += 1
+            if arcs is not None:
+                self.note_coverage(data, arcs)
+        if self.counters is not None:
+            self.iterations, self.valid_examples = self.counters.record(
+                data.status >= Status.VALID)
+
+    def _test_function_in_child(self, data):
+        """Run the test function on data in a forked child process, then
+        update data, and the random state it was drawn with, to be as if it
+        had run here. Returns the arcs it covered if we are collecting
+        coverage.
+
+        If the test raised an error rather than finishing normally, we rerun
+        the buffer it drew here so that the error is raised from this
+        process.
+        """
+        def run():  # pragma: no cover
+            # This only ever runs in the child process.
+            return self._run_isolated(data)
+
+        worker = Worker(run)
+        while not worker.read():
+            pass
+        result = worker.result()
+        if result is None:
+            raise AbnormalExit(
+                'The process running an example exited unexpectedly')
+        results, failed, arcs, state, pool, index = result
+        self.random.setstate(state)
+        self.entropy.pool = pool
+        self.entropy.index = index
+        if failed:
+            try:
+                self._test_function(TestData.for_buffer(hbytes(results[1])))
+            except StopTest:
+                pass
+        data.adopt_results(results)
+        return arcs
+
+    def _run_isolated(self, data):
+        """Run the test function on data as the child process forked by
+        _test_function_in_child does, and return what it sends back: The
+        results of data, whether the test raised an error, the arcs it
+        covered (or None if we aren't collecting coverage), and the state of
+        our random number generator and entropy pool afterwards."""
+        tracer = Tracer() if self.collect_coverage else None
+        failed = False
+        try:
+            if tracer is not None:
+                with tracer:
+                    self._test_function(data)
+            else:
+                self._test_function(data)
+        except StopTest as e:
+            failed = e.testcounter != data.testcounter
+        except BaseException:
+            failed = True
+        data.freeze()
+        return (
+            data.results(), failed,
+            tracer.arcs if tracer is not None else None,
+            self.random.getstate(), self.entropy.pool, self.entropy.index,
+        )
 
     def consider_new_test_data(self, data):
         # Transition rules:
@@ -117,10 +315,59 @@ class TestRunner(object):
                 self.database_key, hbytes(buffer)
             )
 
+    def draw_random(self, n, distribution):
+        """Draw n bytes from distribution, taking uniform ones from our
+        entropy pool."""
+        return _draw_random(self.random, self.entropy, n, distribution)
+
     def note_for_corpus(self, data):
         if data.status == Status.INTERESTING:
             self.save_buffer(data.buffer)
 
+    def save_coverage_buffer(self, buffer):
+        if (
+            self.settings.database is not None and
+            self.database_key is not None and
+            Phase.reuse in self.settings.phases
+        ):
+            self.settings.database.save(
+                coverage_key(self.database_key), hbytes(buffer)
+            )
+
+    def _caching_outcomes(self):
+        return (
+            self.settings.cache_outcomes and
+            self.settings.database is not None and
+            self.database_key is not None and
+            self.test_digest is not None
+        )
+
+    def _known_valid_buffers(self):
+        """Return the set of saved buffers that previous runs of this version
+        of the test found to be valid, dropping the record of any found by
+        other versions of it."""
+        key = outcome_key(self.database_key)
+        known = set()
+        for value in list(self.settings.database.fetch(key)):
+            digest = value[:len(self.test_digest)]
+            if digest == self.test_digest:
+                known.add(hbytes(value[len(digest):]))
+            else:
+                self.settings.database.delete(key, value)
+        return known
+
+    def note_coverage(self, data, arcs):
+        """Add data to the coverage corpus if it executed any arcs that no
+        previous example did."""
+        new_arcs = arcs - self.covered
+        if new_arcs and data.status == Status.VALID:
+            self.covered.update(new_arcs)
+            self.coverage_corpus.append(data)
+            if len(self.coverage_corpus) <= COVERAGE_CORPUS_SIZE:
+                self.save_coverage_buffer(data.buffer)
+            self.debug(u'%d new arcs covered, %d in corpus' % (
+                len(new_arcs), len(self.coverage_corpus)))
+
     def debug(self, message):
         with self.settings:
             debug_report(message)
@@ -147,8 +394,17 @@ class TestRunner(object):
         if sort_key(buffer) >= sort_key(self.last_data.buffer):
             return False
         assert sort_key(buffer) <= sort_key(self.last_data.buffer)
+        if self.tree.lookup(buffer) not in (None, Status.INTERESTING):
+            self.seen.add(buffer)
+            return False
+        self.check_shrink_budget()
         data = TestData.for_buffer(buffer)
         self.test_function(data)
+        return self.incorporate_test_data(data)
+
+    def incorporate_test_data(self, data):
+        """Make data, which the test has just been run on, the new last_data
+        if it is an improvement on it. Returns True if it was."""
         data.freeze()
         self.note_for_corpus(data)
         if self.consider_new_test_data(data):
@@ -161,52 +417,333 @@ class TestRunner(object):
             return True
         return False
 
+    def check_shrink_budget(self):
+        """Stop the run if we are shrinking and have used up the calls or
+        time that the max_shrink_calls and shrink_time_limit settings allow
+        for it, noting that shrinking was cut short."""
+        if self.shrink_start_time is None:
+            return
+        max_calls = self.settings.max_shrink_calls
+        time_limit = self.settings.shrink_time_limit
+        if (
+            max_calls is not None and
+            self.iterations - self.shrink_start_iterations >= max_calls
+        ) or (
+            time_limit is not None and
+            time.time() >= self.shrink_start_time + time_limit
+        ):
+            self.shrink_cut_short = True
+            raise RunIsComplete()
+
+    def incorporate_best_buffer(self, buffers):
+        """Consider each of buffers as a replacement for last_data, accepting
+        the best of them (by sort_key) that is an improvement. Returns True
+        if any of them was accepted.
+
+        When shrink_processes is greater than one the candidates are run in
+        parallel in forked workers, so the buffers passed in should not
+        depend on each other succeeding.
+
+        Buffers may be given as Splices, in which case we only build the
+        ones we get as far as considering running.
+        """
+        candidates = []
+        for buffer in buffers:
+            if len(buffer) > self.last_data.index:
+                buffer = hbytes(materialise(buffer)[:self.last_data.index])
+            if sort_key(buffer) < sort_key(self.last_data.buffer):
+                candidates.append(buffer)
+        candidates.sort(key=sort_key)
+        if (
+            self.settings.shrink_processes > 1 and CAN_FORK and
+            len(candidates) > 1
+        ):
+            candidates = [
+                buffer for buffer in OrderedDict.fromkeys(
+                    hbytes(materialise(c)) for c in candidates
+                )
+                if self._worth_running(buffer)
+            ]
+            if len(candidates) > 1:
+                return self._incorporate_in_processes(candidates)
+        for buffer in candidates:
+            buffer = hbytes(materialise(buffer))
+            if (
+                self._worth_running(buffer) and
+                self.incorporate_new_buffer(buffer)
+            ):
+                return True
+        return False
+
+    def _worth_running(self, buffer):
+        return (
+            buffer not in self.seen and
+            self.tree.lookup(buffer) in (None, Status.INTERESTING)
+        )
+
+    def _shrink_batch_size(self):
+        if self.settings.shrink_processes > 1 and CAN_FORK:
+            return self.settings.shrink_processes * SHRINK_BATCH_PER_PROCESS
+        return 1
+
+    def _incorporate_in_processes(self, candidates):
+        if (
+            self.settings.timeout > 0 and
+            time.time() >= self.start_time + self.settings.timeout
+        ):
+            raise RunIsComplete()
+        self.check_shrink_budget()
+        if self.settings.max_shrink_calls is not None:
+            candidates = candidates[:self.settings.max_shrink_calls - (
+                self.iterations - self.shrink_start_iterations)]
+        n = min(self.settings.shrink_processes, len(candidates))
+        chunks = [candidates[i::n] for i in hrange(n)]
+
+        def worker(i):
+            def run():  # pragma: no cover
+                # This only ever runs in the worker process.
+                self.database_key = None
+                return i, self._run_shrink_candidates(chunks[i])
+            return run
+
+        results = results_as_completed([worker(i) for i in hrange(n)])
+        try:
+            best, evaluated = self._best_shrink_result(chunks, results)
+        finally:
+            results.close()
+        return self._record_shrink_results(best, evaluated)
+
+    def _run_shrink_candidates(self, buffers):
+        """Run the test on each of buffers in turn, stopping after the first
+        that is interesting or raises an error. Returns a list of (status,
+        buffer) pairs for those that ran, where a status of None means the
+        test raised an error."""
+        results = []
+        for buffer in buffers:
+            data = TestData.for_buffer(buffer)
+            try:
+                self.test_function(data)
+            except BaseException:
+                results.append((None, buffer))
+                break
+            results.append((data.status, buffer))
+            if data.status == Status.INTERESTING:
+                break
+        return results
+
+    def _best_shrink_result(self, chunks, results):
+        """Given results, an iterable of (i, chunk_results) pairs where
+        chunk_results is what _run_shrink_candidates returned for chunks[i],
+        return the smallest buffer that was interesting or raised an error
+        (or None if there were none), and a list of every (status, buffer)
+        pair we saw.
+
+        Each chunk is sorted and each worker stops at the first candidate in
+        its chunk that is interesting or raises an error, so this is what
+        running all the candidates here in order would have stopped at. We
+        only stop consuming results once nothing left in a chunk we haven't
+        heard from could beat what we have. A result of None is a worker that
+        died without returning anything.
+        """
+        evaluated = []
+        best = None
+        pending = set(hrange(len(chunks)))
+        for result in results:
+            if result is None:
+                continue
+            i, chunk_results = result
+            pending.discard(i)
+            evaluated.extend(chunk_results)
+            for status, buffer in chunk_results:
+                if (
+                    (status is None or status == Status.INTERESTING) and
+                    (best is None or sort_key(buffer) < sort_key(best))
+                ):
+                    best = buffer
+            if best is not None and all(
+                sort_key(chunks[j][0]) >= sort_key(best)
+                for j in pending
+            ):
+                break
+        return best, evaluated
+
+    def _record_shrink_results(self, best, evaluated):
+        """Update our state with the (status, buffer) pairs in evaluated
+        that ran in workers, and make best the new last_data if it is an
+        improvement. Returns True if it was."""
+        self.iterations += len(evaluated)
+        self.examples_considered += len(evaluated)
+        for status, buffer in evaluated:
+            if status is None and buffer == best:
+                # Replaying the buffer here will raise the same error.
+                self.test_function(TestData.for_buffer(buffer))
+        for status, buffer in evaluated:
+            if status != Status.INTERESTING:
+                self.seen.add(buffer)
+        if best is None:
+            return False
+        # We replay best so that any side effects of the test happen in this
+        # process and we have its TestData. The replay stands in for the
+        # worker's run of it, which we have already counted, and a worker
+        # has already paid for it out of the shrink budget, so we don't go
+        # through incorporate_new_buffer, which might refuse to run it.
+        self.iterations -= 1
+        data = TestData.for_buffer(best)
+        self.test_function(data)
+        return self.incorporate_test_data(data)
+
+    @property
+    def statistics(self):
+        return Statistics(
+            iterations=self.iterations,
+            valid_examples=self.valid_examples,
+            shrinks=self.shrinks,
+            shrink_passes=self.pass_statistics.values(),
+        )
+
+    @contextmanager
+    def shrink_pass(self, name):
+        """Attribute the test calls and shrinks made inside this block to the
+        shrink pass called name."""
+        try:
+            stats = self.pass_statistics[name]
+        except KeyError:
+            stats = PassStatistics(name)
+            self.pass_statistics[name] = stats
+        start_time = time.time()
+        initial_iterations = self.iterations
+        initial_shrinks = self.shrinks
+        initial_cache_hits = self.minimizer_cache_hits
+        initial_cache_misses = self.minimizer_cache_misses
+        initial_size = len(self.last_data.buffer)
+        try:
+            yield
+        finally:
+            stats.calls += self.iterations - initial_iterations
+            stats.shrinks += self.shrinks - initial_shrinks
+            stats.bytes_saved += initial_size - len(self.last_data.buffer)
+            stats.runtime += time.time() - start_time
+            stats.minimizer_cache_hits += (
+                self.minimizer_cache_hits - initial_cache_hits)
+            stats.minimizer_cache_misses += (
+                self.minimizer_cache_misses - initial_cache_misses)
+
     def run(self):
         with self.settings:
             try:
                 self._run()
             except RunIsComplete:
                 pass
+            finally:
+                if self._thread_pool is not None:
+                    self._thread_pool.shutdown()
+                    self._thread_pool = None
+            if (
+                self.isolate_examples and self.last_data is not None and
+                self.last_data.status == Status.INTERESTING
+            ):
+                # The test only ever failed in child processes, so anything
+                # it does when it fails (such as recording the error) has
+                # not happened here yet.
+                try:
+                    self._test_function(
+                        TestData.for_buffer(self.last_data.buffer))
+                except StopTest:
+                    pass
             self.debug(
                 u'Run complete after %d examples (%d valid) and %d shrinks' % (
                     self.iterations, self.valid_examples, self.shrinks,
                 ))
+            if self.shrink_cut_short:
+                self.debug(u'Shrinking was cut short by its budget')
+            for stats in self.pass_statistics.values():
+                self.debug(
+                    u'Shrink pass %s: %d calls, %d shrinks, %d bytes saved '
+                    u'in %.2fs' % (
+                        stats.name, stats.calls, stats.shrinks,
+                        stats.bytes_saved, stats.runtime,
+                    ))
+            statistics = self.statistics
+            note_statistics(statistics)
+            if (
+                self.settings.record_statistics and
+                self.database_key is not None
+            ):
+                save_statistics(self.database_key, statistics)
+
+    def _choose_from_corpus(self):
+        """Pick an example from the coverage corpus, strongly preferring
+        recent ones: They tend to be the ones that got deepest into the
+        code."""
+        i = int(len(self.coverage_corpus) * self.random.random() ** 3)
+        return self.coverage_corpus[-1 - i]
+
+    def _new_mutator(self, random=None):
+        """Return a draw_bytes function that mutates last_data. If random is
+        given, the mutator draws everything from that rather than from our
+        own random state, so that it may be used from another thread."""
+        if random is None:
+            random = self.random
+            entropy = self.entropy
+        else:
+            entropy = EntropyPool(random)
+
+        # When we are guided by coverage, half the time we copy existing data
+        # from an example that reached new code rather than from the last one.
+        if self.coverage_corpus and self.random.randint(0, 1):
+            corpus_data = self._choose_from_corpus()
+        else:
+            corpus_data = None
+        # These are filled in lazily, so do so now rather than while drawing.
+        self.last_data.block_starts
+        if corpus_data is not None:
+            corpus_data.block_starts
+
+        def draw_random(n, distribution):
+            return _draw_random(random, entropy, n, distribution)
 
-    def _new_mutator(self):
         def draw_new(data, n, distribution):
-            return distribution(self.random, n)
+            return draw_random(n, distribution)
 
         def draw_existing(data, n, distribution):
-            return self.last_data.buffer[data.index:data.index + n]
+            source = corpus_data or self.last_data
+            if data.index + n > len(source.buffer):
+                return draw_random(n, distribution)
+            return source.buffer[data.index:data.index + n]
 
         def draw_smaller(data, n, distribution):
             existing = self.last_data.buffer[data.index:data.index + n]
-            r = distribution(self.random, n)
+            r = draw_random(n, distribution)
             if r <= existing:
                 return r
-            return _draw_predecessor(self.random, existing)
+            return _draw_predecessor(entropy, existing)
 
         def draw_larger(data, n, distribution):
             existing = self.last_data.buffer[data.index:data.index + n]
-            r = distribution(self.random, n)
+            r = draw_random(n, distribution)
             if r >= existing:
                 return r
-            return _draw_successor(self.random, existing)
+            return _draw_successor(entropy, existing)
 
         def reuse_existing(data, n, distribution):
-            choices = data.block_starts.get(n, []) or \
-                self.last_data.block_starts.get(n, [])
+            if corpus_data is None:
+                source = self.last_data
+                choices = data.block_starts.get(n, []) or \
+                    source.block_starts.get(n, [])
+            else:
+                source = corpus_data
+                choices = source.block_starts.get(n, [])
             if choices:
-                i = self.random.choice(choices)
-                return self.last_data.buffer[i:i + n]
+                i = random.choice(choices)
+                return source.buffer[i:i + n]
             else:
-                return distribution(self.random, n)
+                return draw_random(n, distribution)
 
         def flip_bit(data, n, distribution):
             buf = bytearray(
                 self.last_data.buffer[data.index:data.index + n])
-            i = self.random.randint(0, n - 1)
-            k = self.random.randint(0, 7)
+            i = random.randint(0, n - 1)
+            k = random.randint(0, 7)
             buf[i] ^= (1 << k)
             return hbytes(buf)
 
@@ -215,7 +752,7 @@ class TestRunner(object):
 
         def draw_constant(data, n, distribution):
             return bytes_from_list([
-                self.random.randint(0, 255)
+                random.randint(0, 255)
             ] * n)
 
         options = [
@@ -226,21 +763,457 @@ class TestRunner(object):
         ]
 
         bits = [
-            self.random.choice(options) for _ in hrange(3)
+            random.choice(options) for _ in hrange(3)
         ]
 
         def draw_mutated(data, n, distribution):
             if (
                 data.index + n > len(self.last_data.buffer)
             ):
-                return distribution(self.random, n)
-            return self.random.choice(bits)(data, n, distribution)
+                return draw_random(n, distribution)
+            return random.choice(bits)(data, n, distribution)
         return draw_mutated
 
+    def _batch_mutators(self, mutator, n):
+        """Return the draw_bytes functions for a batch of n examples run at
+        once.
+
+        Examples run on the thread pool draw concurrently, so rather than
+        sharing mutator each of those gets its own, drawing from its own
+        random number generator seeded in order from ours. This keeps a run
+        reproducible from its seed however the threads are scheduled.
+        """
+        if n == 1 or self._concurrent_test_function is not None:
+            return [mutator] * n
+        return [
+            self._new_mutator(Random(self.random.getrandbits(128)))
+            for _ in hrange(n)
+        ]
+
+    def _generation_complete(self):
+        return (
+            self.valid_examples >= self.settings.max_examples or
+            self.iterations >= max(
+                self.settings.max_iterations, self.settings.max_examples
+            ) or (
+                self.settings.timeout > 0 and
+                time.time() >= self.start_time + self.settings.timeout
+            )
+        )
+
+    def _generate(self):
+        if (
+            self.last_data is None or
+            self.last_data.status < Status.INTERESTING
+        ):
+            self.new_buffer()
+
+        mutations = 0
+        mutator = self._new_mutator()
+        while self.last_data.status != Status.INTERESTING:
+            if self._generation_complete():
+                return
+            if mutations >= self.settings.max_mutations:
+                mutations = 0
+                if self.coverage_corpus and self.random.randint(0, 1):
+                    self.last_data = self._choose_from_corpus()
+                else:
+                    self.new_buffer()
+                mutator = self._new_mutator()
+            else:
+                batch = [
+                    TestData(
+                        draw_bytes=self.tree.avoid_dead(m),
+                        max_length=self.settings.buffer_size
+                    )
+                    for m in self._batch_mutators(
+                        mutator, self._batch_size())
+                ]
+                if len(batch) > 1:
+                    self.test_functions_concurrently(batch)
+                else:
+                    self.test_function(batch[0])
+                for data in batch:
+                    data.freeze()
+                    self.note_for_corpus(data)
+                    if self.last_data.status == Status.INTERESTING:
+                        # An earlier example in this batch was interesting.
+                        # The rest weren't shrunk from it, so comparing them
+                        # to it makes no sense. Leave that to the shrinker.
+                        continue
+                    prev_data = self.last_data
+                    if self.consider_new_test_data(data):
+                        self.last_data = data
+                        if data.status > prev_data.status:
+                            mutations = 0
+                    else:
+                        mutator = self._new_mutator()
+                mutations += len(batch) - 1
+
+            mutations += 1
+
+    def _generate_in_processes(self):
+        """Run the generate phase in generate_processes forked workers, each
+        with its own random number generator but sharing the example budget.
+
+        The first worker to find an interesting example (or to hit an error
+        in the test function) sends its buffer back, the others are stopped,
+        and the buffer is replayed here so that shrinking and error reporting
+        happen in this process as normal.
+        """
+        counters = SharedCounters(
+            self.settings.generate_processes,
+            self.iterations, self.valid_examples)
+        randoms = [
+            Random(self.random.getrandbits(128))
+            for _ in hrange(self.settings.generate_processes)
+        ]
+
+        def worker(i, random):
+            def run():  # pragma: no cover
+                # This only ever runs in the worker process.
+                return self._generate_as_worker(counters, i, random)
+            return run
+
+        best = None
+        results = results_as_completed([
+            worker(i, r) for i, r in enumerate(randoms)])
+        try:
+            for result in results:
+                if result is None:
+                    continue
+                status, buffer = result
+                if status is None or status == Status.INTERESTING:
+                    best = result
+                    break
+                if best is None or status > best[0]:
+                    best = result
+        finally:
+            results.close()
+        self.iterations, self.valid_examples = counters.totals()
+        if best is None:
+            return
+        status, buffer = best
+        if (
+            self.last_data is not None and
+            status is not None and
+            status <= self.last_data.status
+        ):
+            return
+        # We replay the buffer here rather than trusting the worker so that
+        # any side effects of the test (e.g. recording the exception it
+        # raised) happen in this process, and so that an error in the test
+        # is raised from here.
+        data = TestData.for_buffer(hbytes(buffer))
+        self.test_function(data)
+        data.freeze()
+        self.note_for_corpus(data)
+        if (
+            self.last_data is None or
+            self.consider_new_test_data(data)
+        ):
+            self.last_data = data
+
+    def _generate_as_worker(self, counters, i, random):
+        """Run the generate phase as worker number i of _generate_in_processes
+        does, drawing from random and counting examples in counters. Returns
+        the status and buffer of the best example found, or a status of None
+        and the buffer of the example that raised an error.
+
+        This changes the runner's state for good, so must only be called in
+        a process that is going to throw the runner away afterwards.
+        """
+        self.random = random
+        self.entropy = EntropyPool(random)
+        counters.slot = i
+        self.counters = counters
+        # Only the parent writes to the database: the connection we
+        # inherited is not safe to share.
+        self.database_key = None
+        try:
+            self._generate()
+        except BaseException:
+            return None, self.current_data.buffer
+        return self.last_data.status, self.last_data.buffer
+
+    def shrink(self):
+        """Repeatedly run the shrink passes until none of them can make
+        last_data any smaller.
+
+        Passes are run in order of how well they have been paying off
+        recently (see ShrinkPass.score), and passes that keep failing are
+        skipped. Skipping is only ever a shortcut: we only stop once a round
+        with every pass in it makes no progress.
+
+        The max_shrink_calls and shrink_time_limit settings are counted from
+        here, and may stop us earlier (see check_shrink_budget).
+        """
+        self.shrink_start_time = time.time()
+        self.shrink_start_iterations = self.iterations
+        passes = [
+            ShrinkPass(name, getattr(self, name)) for name in (
+                'delete_random_intervals',
+                'delete_interval_chunks',
+                'delete_intervals',
+                'delete_bytes',
+                'lower_blocks',
+                'minimize_duplicated_blocks',
+                'minimize_individual_blocks',
+                'replace_intervals',
+            )
+        ]
+        run_all = True
+        while True:
+            change_counter = self.changed
+            for shrink_pass in schedule_shrink_passes(passes, run_all):
+                initial_calls = self.iterations
+                initial_shrinks = self.shrinks
+                with self.shrink_pass(shrink_pass.name):
+                    shrink_pass.run()
+                shrink_pass.record(
+                    self.iterations - initial_calls,
+                    self.shrinks - initial_shrinks,
+                )
+            if self.changed == change_counter:
+                if run_all:
+                    return
+                run_all = True
+            else:
+                run_all = False
+
+    def delete_random_intervals(self):
+        failed_deletes = 0
+        while self.last_data.intervals and failed_deletes < 10:
+            if self.random.randint(0, 1):
+                u, v = self.random.choice(self.last_data.intervals)
+            else:
+                u, v = sorted((
+                    self.random.choice(self.last_data.intervals)
+                ))
+            if (
+                v < len(self.last_data.buffer)
+            ) and self.incorporate_new_buffer(
+                self.last_data.buffer[:u] +
+                self.last_data.buffer[v:]
+            ):
+                failed_deletes = 0
+            else:
+                failed_deletes += 1
+
+    def delete_intervals(self):
+        batch_size = self._shrink_batch_size()
+        i = 0
+        while i < len(self.last_data.intervals):
+            buf = self.last_data.buffer
+            batch = self.last_data.intervals[i:i + batch_size]
+            if not self.incorporate_best_buffer([
+                Splice(buf, u, v) for u, v in batch
+            ]):
+                i += len(batch)
+
+    def delete_bytes(self):
+        self._delete_runs(
+            lambda: len(self.last_data.buffer),
+            lambda i, j: (i, j),
+        )
+
+    def delete_interval_chunks(self):
+        """Delete runs of adjacent intervals at the same level of nesting,
+        e.g. many consecutive elements of a list at once."""
+        level = 0
+        while level < len(self.last_data.intervals_by_level):
+            def count():
+                levels = self.last_data.intervals_by_level
+                return len(levels[level]) if level < len(levels) else 0
+
+            def span(i, j):
+                intervals = self.last_data.intervals_by_level[level]
+                return intervals[i][0], intervals[j - 1][1]
+            self._delete_runs(count, span)
+            level += 1
+
+    def _delete_runs(self, count, span):
+        """Delete runs of consecutive units from last_data.buffer in the style
+        of delta debugging.
+
+        count() returns the number of units in the current buffer, and
+        span(i, j) the start and end in the buffer of units i to j - 1.
+
+        We walk along the buffer trying to delete a run of k units at each
+        position, starting with k as large as will fit. Each failure halves k,
+        each success doubles it, and we only move on once we've failed to
+        delete a single unit. This means that when large parts of the buffer
+        can go we need a number of calls logarithmic rather than linear in its
+        length, but in the worst case we don't do much worse than deleting one
+        unit at a time.
+        """
+        batch_size = self._shrink_batch_size()
+        k = 1
+        while k * 2 <= count():
+            k *= 2
+        i = 0
+        while i < count():
+            while i + k > count():
+                k //= 2
+            # When running in parallel we try each of the run lengths we'd
+            # fall back to after a failure at once.
+            sizes = [k]
+            while len(sizes) < batch_size and sizes[-1] > 1:
+                sizes.append(sizes[-1] // 2)
+            buf = self.last_data.buffer
+            candidates = []
+            for size in sizes:
+                u, v = span(i, i + size)
+                candidates.append(Splice(buf, u, v))
+            if self.incorporate_best_buffer(candidates):
+                k *= 2
+            elif sizes[-1] > 1:
+                k = sizes[-1] // 2
+            else:
+                i += 1
+                k = 1
+
+    def lower_blocks(self):
+        i = 0
+        while i < len(self.last_data.blocks):
+            u, v = self.last_data.blocks[i]
+            buf = self.last_data.buffer
+            block = buf[u:v]
+            n = v - u
+            all_blocks = sorted(set([bytes(n)] + [
+                buf[a:a + n]
+                for a in self.last_data.block_starts[n]
+            ]))
+            better_blocks = all_blocks[:all_blocks.index(block)]
+            self.incorporate_best_buffer([
+                Splice(buf, u, v, b) for b in better_blocks
+            ])
+            i += 1
+
+    def block_index(self):
+        """The BlockIndex for last_data, rebuilt only if last_data has changed
+        in a way the index could not keep track of."""
+        if self._block_index is None or (
+            self._block_index.data is not self.last_data
+        ):
+            self._block_index = BlockIndex(self.last_data)
+        return self._block_index
+
+    def minimize(self, block, condition):
+        """Minimize block subject to condition with a Minimizer, counting its
+        cache hits and misses towards the current shrink pass."""
+        m = Minimizer(block, condition, self.random)
+        try:
+            m.run()
+        finally:
+            self.minimizer_cache_hits += m.cache_hits
+            self.minimizer_cache_misses += m.cache_misses
+        return m.current
+
+    def minimize_duplicated_blocks(self):
+        block_counter = -1
+        while block_counter < self.changed:
+            block_counter = self.changed
+            for block in self.block_index().duplicates():
+                index = self.block_index()
+                starts = index.positions.get(block)
+                if starts is None or len(starts) < 2:
+                    continue
+                starts = list(starts)
+                current = [block]
+
+                def replace(b):
+                    # Candidates are only meaningful while last_data still
+                    # has our blocks where they were when we started, which
+                    # is exactly when its index is still the one we have.
+                    if self.block_index() is not index:
+                        return False
+                    if not self.incorporate_new_buffer(
+                        index.replace(starts, len(b), b)
+                    ):
+                        return False
+                    index.update(self.last_data, starts, current[0], b)
+                    current[0] = b
+                    return True
+                self.minimize(block, replace)
+
+    def minimize_individual_blocks(self):
+        i = 0
+        while i < len(self.last_data.blocks):
+            u, v = self.last_data.blocks[i]
+            self.minimize(
+                self.last_data.buffer[u:v],
+                lambda b: self.incorporate_new_buffer(
+                    self.last_data.buffer[:u] + b +
+                    self.last_data.buffer[v:],
+                )
+            )
+            i += 1
+
+    def replace_intervals(self):
+        """Try replacing each example with something smaller: One of the
+        smallest intervals in the buffer or examples at the same level of
+        nesting, or one of the examples inside it. See ReplacementIndex for
+        exactly which we try."""
+        level = 0
+        smallest = None
+        while level < len(self.last_data.intervals_by_level):
+            i = 0
+            index = None
+            while True:
+                levels = self.last_data.intervals_by_level
+                if level >= len(levels) or i >= len(levels[level]):
+                    break
+                if index is None:
+                    if smallest is None or smallest[0] is not self.last_data:
+                        smallest = (
+                            self.last_data, smallest_intervals(self.last_data))
+                    index = ReplacementIndex(
+                        self.last_data, level, smallest[1])
+                buf = self.last_data.buffer
+                u, v = levels[level][i]
+                for replacements in index.candidates(u, v):
+                    if self.incorporate_best_buffer([
+                        Splice(buf, u, v, r) for r in replacements
+                    ]):
+                        # Stay where we are, as whatever replaced this
+                        # example may well be replaceable in turn.
+                        index = None
+                        break
+                else:
+                    i += 1
+            level += 1
+
+    def _reuse_coverage_corpus(self):
+        """Replay the coverage corpus saved by previous runs, so that
+        generation can start from the examples that got furthest into the
+        code last time rather than from scratch.
+
+        Saved examples that no longer reach any new code are dropped from
+        the database.
+        """
+        key = coverage_key(self.database_key)
+        corpus = sorted(self.settings.database.fetch(key), key=sort_key)
+        for existing in corpus:
+            if self._generation_complete():
+                return
+            corpus_size = len(self.coverage_corpus)
+            data = TestData.for_buffer(existing)
+            self.test_function(data)
+            data.freeze()
+            self.note_for_corpus(data)
+            if (
+                len(self.coverage_corpus) == corpus_size or
+                len(self.coverage_corpus) > COVERAGE_CORPUS_SIZE
+            ):
+                self.settings.database.delete(key, existing)
+            if data.status == Status.INTERESTING:
+                self.last_data = data
+                return
+
     def _run(self):
         self.last_data = None
-        mutations = 0
-        start_time = time.time()
+        self.collect_coverage = self.settings.coverage_guided
 
         if (
             self.settings.database is not None and
@@ -250,6 +1223,10 @@ class TestRunner(object):
                 self.settings.database.fetch(self.database_key),
                 key=lambda d: (len(d), d)
             )
+            if self._caching_outcomes():
+                known_valid = self._known_valid_buffers()
+            else:
+                known_valid = ()
             for existing in corpus:
                 if self.valid_examples >= self.settings.max_examples:
                     return
@@ -257,6 +1234,16 @@ class TestRunner(object):
                     self.settings.max_iterations, self.settings.max_examples
                 ):
                     return
+                if hbytes(existing) in known_valid:
+                    # We know what would happen, so skip straight to the
+                    # garbage collection below.
+                    if self.random.randint(0, 2) == 0:
+                        self.settings.database.delete(
+                            self.database_key, existing)
+                        self.settings.database.delete(
+                            outcome_key(self.database_key),
+                            self.test_digest + existing)
+                    continue
                 data = TestData.for_buffer(existing)
                 self.test_function(data)
                 data.freeze()
@@ -273,53 +1260,41 @@ class TestRunner(object):
                     if self.random.randint(0, 2) == 0:
                         self.settings.database.delete(
                             self.database_key, existing)
+                    elif self._caching_outcomes():
+                        self.settings.database.save(
+                            outcome_key(self.database_key),
+                            self.test_digest + existing)
                 else:
                     assert data.status == Status.INTERESTING
                     self.last_data = data
                     break
 
+            if (
+                self.settings.coverage_guided and
+                Phase.reuse in self.settings.phases and (
+                    self.last_data is None or
+                    self.last_data.status < Status.INTERESTING
+                )
+            ):
+                self._reuse_coverage_corpus()
+
         if Phase.generate in self.settings.phases:
+            if (
+                self.settings.generate_processes > 1 and CAN_FORK and (
+                    self.last_data is None or
+                    self.last_data.status < Status.INTERESTING
+                )
+            ):
+                self._generate_in_processes()
+            else:
+                self._generate()
             if (
                 self.last_data is None or
                 self.last_data.status < Status.INTERESTING
             ):
-                self.new_buffer()
-
-            mutator = self._new_mutator()
-            while self.last_data.status != Status.INTERESTING:
-                if self.valid_examples >= self.settings.max_examples:
-                    return
-                if self.iterations >= max(
-                    self.settings.max_iterations, self.settings.max_examples
-                ):
-                    return
-                if (
-                    self.settings.timeout > 0 and
-                    time.time() >= start_time + self.settings.timeout
-                ):
-                    return
-                if mutations >= self.settings.max_mutations:
-                    mutations = 0
-                    self.new_buffer()
-                    mutator = self._new_mutator()
-                else:
-                    data = TestData(
-                        draw_bytes=mutator,
-                        max_length=self.settings.buffer_size
-                    )
-                    self.test_function(data)
-                    data.freeze()
-                    self.note_for_corpus(data)
-                    prev_data = self.last_data
-                    if self.consider_new_test_data(data):
-                        self.last_data = data
-                        if data.status > prev_data.status:
-                            mutations = 0
-                    else:
-                        mutator = self._new_mutator()
-
-                mutations += 1
+                return
 
+        self.collect_coverage = False
         data = self.last_data
         if data is None:
             return
@@ -339,146 +1314,312 @@ class TestRunner(object):
         if data.status != Status.INTERESTING:
             return
 
-        change_counter = -1
+        self.shrink()
 
-        while self.changed > change_counter:
-            change_counter = self.changed
-            failed_deletes = 0
-            while self.last_data.intervals and failed_deletes < 10:
-                if self.random.randint(0, 1):
-                    u, v = self.random.choice(self.last_data.intervals)
-                else:
-                    n = len(self.last_data.buffer) - 1
-                    u, v = sorted((
-                        self.random.choice(self.last_data.intervals)
-                    ))
-                if (
-                    v < len(self.last_data.buffer)
-                ) and self.incorporate_new_buffer(
-                    self.last_data.buffer[:u] +
-                    self.last_data.buffer[v:]
-                ):
-                    failed_deletes = 0
-                else:
-                    failed_deletes += 1
-            i = 0
-            while i < len(self.last_data.intervals):
-                u, v = self.last_data.intervals[i]
-                if not self.incorporate_new_buffer(
-                    self.last_data.buffer[:u] +
-                    self.last_data.buffer[v:]
-                ):
-                    i += 1
-            i = 0
-            while i + 1 < len(self.last_data.buffer):
-                if not self.incorporate_new_buffer(
-                    self.last_data.buffer[:i] +
-                    self.last_data.buffer[i + 1:]
-                ):
-                    i += 1
-            i = 0
-            while i < len(self.last_data.blocks):
-                u, v = self.last_data.blocks[i]
-                buf = self.last_data.buffer
-                block = buf[u:v]
-                n = v - u
-                all_blocks = sorted(set([bytes(n)] + [
-                    buf[a:a + n]
-                    for a in self.last_data.block_starts[n]
-                ]))
-                better_blocks = all_blocks[:all_blocks.index(block)]
-                for b in better_blocks:
-                    if self.incorporate_new_buffer(
-                        buf[:u] + b + buf[v:]
-                    ):
-                        break
-                i += 1
 
-            block_counter = -1
-            while block_counter < self.changed:
-                block_counter = self.changed
-                blocks = [
-                    k for k, count in
-                    Counter(
-                        self.last_data.buffer[u:v]
-                        for u, v in self.last_data.blocks).items()
-                    if count > 1
-                ]
-                for block in blocks:
-                    parts = [
-                        self.last_data.buffer[r:s]
-                        for r, s in self.last_data.blocks
-                    ]
-
-                    def replace(b):
-                        return b''.join(
-                            bytes(b if c == block else c) for c in parts
-                        )
-                    minimize(
-                        block,
-                        lambda b: self.incorporate_new_buffer(replace(b)),
-                        self.random
-                    )
+class ShrinkPass(object):
+    """A named pass of the shrinker, along with a record of how well it has
+    been doing recently so that we can decide when to run it.
 
-            i = 0
-            while i < len(self.last_data.blocks):
-                u, v = self.last_data.blocks[i]
-                minimize(
-                    self.last_data.buffer[u:v],
-                    lambda b: self.incorporate_new_buffer(
-                        self.last_data.buffer[:u] + b +
-                        self.last_data.buffer[v:],
-                    ), self.random
-                )
-                i += 1
+    Calls and shrinks are tracked as exponentially decaying sums over the
+    runs of the pass, so that a pass that used to work but has stopped doing
+    so loses its priority quickly.
+    """
 
-            i = 0
-            alternatives = None
-            while i < len(self.last_data.intervals):
-                if alternatives is None:
-                    alternatives = sorted(set(
-                        self.last_data.buffer[u:v]
-                        for u, v in self.last_data.intervals), key=len)
-                u, v = self.last_data.intervals[i]
-                for a in alternatives:
-                    buf = self.last_data.buffer
-                    if (
-                        len(a) < v - u or
-                        (len(a) == (v - u) and a < buf[u:v])
-                    ):
-                        if self.incorporate_new_buffer(buf[:u] + a + buf[v:]):
-                            alternatives = None
-                            break
-                i += 1
+    def __init__(self, name, run):
+        self.name = name
+        self.run = run
+        self.recent_calls = 0.0
+        self.recent_shrinks = 0.0
+        self.consecutive_failures = 0
 
+    def __repr__(self):
+        return 'ShrinkPass(%r)' % (self.name,)
 
-def _draw_predecessor(rnd, xs):
-    r = bytearray()
-    any_strict = False
-    for x in to_bytes_sequence(xs):
-        if not any_strict:
-            c = rnd.randint(0, x)
-            if c < x:
-                any_strict = True
+    @property
+    def score(self):
+        """An estimate of how many shrinks we get per test call from running
+        this pass. Passes that have not run yet get the highest possible
+        score so that everything gets tried at least once."""
+        return (self.recent_shrinks + 1) / (self.recent_calls + 1)
+
+    def record(self, calls, shrinks):
+        self.recent_calls = self.recent_calls * SHRINK_PASS_DECAY + calls
+        self.recent_shrinks = (
+            self.recent_shrinks * SHRINK_PASS_DECAY + shrinks)
+        if shrinks:
+            self.consecutive_failures = 0
         else:
-            c = rnd.randint(0, 255)
+            self.consecutive_failures += 1
+
+
+def schedule_shrink_passes(passes, run_all):
+    """Return the passes to run in the next round of shrinking, best first.
+
+    Unless run_all is True, passes which have failed to shrink anything the
+    last SHRINK_PASS_MAX_FAILURES times they ran are left out.
+    """
+    if not run_all:
+        passes = [
+            p for p in passes
+            if p.consecutive_failures < SHRINK_PASS_MAX_FAILURES
+        ]
+    return sorted(passes, key=lambda p: -p.score)
+
+
+def _draw_random(random, entropy, n, distribution):
+    """Draw n bytes from distribution, taking uniform ones from entropy,
+    which draws from random."""
+    if distribution is uniform:
+        return entropy.draw(n)
+    return distribution(random, n)
+
+
+def _draw_predecessor(entropy, xs):
+    xs = to_bytes_sequence(xs)
+    r = bytearray()
+    for i, x in enumerate(xs):
+        c = entropy.below(x + 1)
         r.append(c)
+        if c < x:
+            r.extend(entropy.draw(len(xs) - i - 1))
+            break
     return hbytes(r)
 
 
-def _draw_successor(rnd, xs):
+def _draw_successor(entropy, xs):
+    xs = to_bytes_sequence(xs)
     r = bytearray()
-    any_strict = False
-    for x in to_bytes_sequence(xs):
-        if not any_strict:
-            c = rnd.randint(x, 255)
-            if c > x:
-                any_strict = True
-        else:
-            c = rnd.randint(0, 255)
+    for i, x in enumerate(xs):
+        c = x + entropy.below(256 - x)
         r.append(c)
+        if c > x:
+            r.extend(entropy.draw(len(xs) - i - 1))
+            break
     return hbytes(r)
 
 
+def coverage_key(database_key):
+    """The key in the database under which we save the coverage corpus for
+    the test whose examples are saved under database_key."""
+    return database_key + b'.coverage'
+
+
+def outcome_key(database_key):
+    """The key in the database under which we save the buffers that are
+    known to be valid for the test whose examples are saved under
+    database_key. Each is saved prefixed with the digest of the test it was
+    valid for."""
+    return database_key + b'.outcomes'
+
+
+class Splice(object):
+    """The buffer base with base[start:end] replaced by replacement.
+
+    Shrink passes describe their candidates like this rather than building
+    them, so that we only pay for copying the buffer for candidates that get
+    as far as being run. Splices compare like the buffers they describe, but
+    without building them when compared to their base or to another edit of
+    the same part of it.
+    """
+
+    __slots__ = ('base', 'start', 'end', 'replacement', '_buffer')
+
+    def __init__(self, base, start, end, replacement=b''):
+        self.base = base
+        self.start = start
+        self.end = end
+        self.replacement = replacement
+        self._buffer = None
+
+    def __repr__(self):
+        return 'Splice(%r, %d, %d, %r)' % (
+            self.base, self.start, self.end, self.replacement)
+
+    def __len__(self):
+        return len(self.base) - (self.end - self.start) + len(self.replacement)
+
+    def __getitem__(self, i):
+        return self.buffer[i]
+
+    @property
+    def buffer(self):
+        if self._buffer is None:
+            self._buffer = hbytes(
+                self.base[:self.start] + self.replacement +
+                self.base[self.end:])
+        return self._buffer
+
+    def __comparable(self, other):
+        """Return a pair of byte strings that compare the same way as self
+        and other do: The parts where they differ if we can tell what those
+        are without building anything, or else the whole of both."""
+        n = len(self.replacement)
+        if (
+            isinstance(other, Splice) and
+            other.base is self.base and
+            other.start == self.start and
+            other.end == self.end and
+            len(other.replacement) == n
+        ):
+            return self.replacement, other.replacement
+        if other is self.base and n == self.end - self.start:
+            return self.replacement, self.base[self.start:self.end]
+        return self.buffer, materialise(other)
+
+    def __eq__(self, other):
+        mine, theirs = self.__comparable(other)
+        return mine == theirs
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        mine, theirs = self.__comparable(other)
+        return mine < theirs
+
+    def __gt__(self, other):
+        mine, theirs = self.__comparable(other)
+        return mine > theirs
+
+    def __hash__(self):
+        return hash(self.buffer)
+
+
+class BlockIndex(object):
+    """An index from the contents of each block drawn by a frozen TestData to
+    the starts of the blocks with those contents.
+
+    The duplicated blocks pass needs to know which blocks occur more than
+    once and to build buffers with all of them replaced. Doing that from the
+    list of blocks costs time proportional to the number of blocks for every
+    candidate, where with the index it only costs time proportional to the
+    number of copies. Replacing blocks with ones of the same size usually
+    leaves the test drawing the same blocks, so when a candidate is accepted
+    we move the index over to the new data rather than rebuilding it.
+    """
+
+    def __init__(self, data):
+        assert data.frozen
+        self.data = data
+        self.positions = {}
+        buffer = data.buffer
+        for u, v in data.blocks:
+            self.positions.setdefault(buffer[u:v], []).append(u)
+
+    def duplicates(self):
+        """The contents of every block that occurs more than once."""
+        return [
+            block for block, starts in self.positions.items()
+            if len(starts) > 1
+        ]
+
+    def replace(self, starts, n, replacement):
+        """Return our data's buffer with the n bytes at each of starts
+        replaced by replacement."""
+        assert len(replacement) == n
+        buffer = bytearray(self.data.buffer)
+        for u in starts:
+            buffer[u:u + n] = replacement
+        return hbytes(buffer)
+
+    def update(self, data, starts, block, replacement):
+        """Make this the index of data, which was accepted as our data with
+        the copies of block at starts replaced by replacement.
+
+        If data did not draw blocks in the same places the index is left
+        alone, and so will be rebuilt for data when next needed. If it did,
+        it drew exactly the buffer we gave it, so only the blocks at starts
+        have changed."""
+        if data.block_ends != self.data.block_ends:
+            return
+        replaced = set(starts)
+        remaining = [u for u in self.positions[block] if u not in replaced]
+        if remaining:
+            self.positions[block] = remaining
+        else:
+            del self.positions[block]
+        self.positions.setdefault(replacement, []).extend(starts)
+        self.positions[replacement].sort()
+        self.data = data
+
+
+class ReplacementIndex(object):
+    """The candidates that replace_intervals tries in place of the examples
+    at one level of nesting of a frozen TestData.
+
+    Trying the contents of every interval in place of every other, as we
+    used to, takes memory and calls quadratic in the size of the buffer for
+    deeply nested data. Instead, for an example at this level we try the
+    REPLACEMENT_ALTERNATIVES smallest intervals anywhere (which the caller
+    passes in as smallest, see smallest_intervals) together with as many of
+    the smallest examples at the same level, then for each of the levels 1,
+    2, 4, ... below it (furthest first) the smallest examples inside it at
+    that level. The last of these let us replace a deeply nested example
+    with a much smaller part of itself in a few steps rather than one level
+    at a time.
+
+    Examples at the same level don't overlap, so none of these take up more
+    space than the buffer or the example being replaced.
+    """
+
+    def __init__(self, data, level, smallest):
+        assert data.frozen
+        self.buffer = data.buffer
+        levels = data.intervals_by_level
+        self.smallest = sorted(set(smallest).union(smallest_distinct(
+            self.buffer[u:v] for u, v in levels[level])), key=sort_key)
+        self.descendants = []
+        distance = 1
+        while level + distance < len(levels):
+            values = levels[level + distance].values
+            self.descendants.append((values[::2], values[1::2]))
+            distance *= 2
+
+    def candidates(self, u, v):
+        """Yield lists of replacements to try for the example at [u, v)."""
+        yield self.smallest
+        for starts, ends in reversed(self.descendants):
+            # Everything at a lower level that starts inside [u, v) is
+            # inside it.
+            i = bisect_left(starts, u)
+            j = bisect_left(starts, v, i)
+            if i < j:
+                yield smallest_distinct(
+                    self.buffer[starts[k]:ends[k]] for k in hrange(i, j))
+
+
+def smallest_intervals(data):
+    """The contents of the shortest intervals of the frozen TestData data,
+    up to REPLACEMENT_ALTERNATIVES distinct ones.
+
+    data.intervals are sorted longest first, so we read them from the end and
+    stop as soon as we have enough rather than slicing out every one.
+    """
+    buffer = data.buffer
+    intervals = data.intervals
+    result = set()
+    for i in hrange(len(intervals) - 1, -1, -1):
+        if len(result) >= REPLACEMENT_ALTERNATIVES:
+            break
+        u, v = intervals[i]
+        result.add(buffer[u:v])
+    return sorted(result, key=sort_key)
+
+
+def smallest_distinct(buffers):
+    """The REPLACEMENT_ALTERNATIVES smallest distinct buffers among
+    buffers."""
+    return sorted(set(buffers), key=sort_key)[:REPLACEMENT_ALTERNATIVES]
+
+
+def materialise(buffer):
+    """Return buffer as an actual sequence of bytes, building it if it is a
+    Splice."""
+    if isinstance(buffer, Splice):
+        return buffer.buffer
+    return buffer
+
+
 def sort_key(buffer):
     return (len(buffer), buffer)
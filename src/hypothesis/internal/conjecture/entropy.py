@@ -0,0 +1,75 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis.internal.compat import hbytes, int_to_bytes
+
+# How many random bytes to generate at once.
+POOL_SIZE = 4096
+
+
+class EntropyPool(object):
+    """A source of random bytes which generates them from random a block at
+    a time and hands out slices of that, because asking random for a few
+    bytes at a time costs far more per byte.
+
+    Everything drawn from the pool is determined by the state of random when
+    it was created, so runs with the same seed still see the same data.
+    """
+
+    def __init__(self, random, size=POOL_SIZE):
+        self.random = random
+        self.size = size
+        self.pool = hbytes(b'')
+        self.index = 0
+
+    def __refill(self):
+        self.pool = int_to_bytes(
+            self.random.getrandbits(8 * self.size), self.size)
+        self.index = 0
+
+    def draw(self, n):
+        """Return n uniformly random bytes."""
+        i = self.index
+        j = i + n
+        if j > len(self.pool):
+            if n > self.size:
+                return int_to_bytes(self.random.getrandbits(8 * n), n)
+            self.__refill()
+            i = 0
+            j = n
+        self.index = j
+        return self.pool[i:j]
+
+    def byte(self):
+        """Return a uniformly random integer in [0, 255]."""
+        i = self.index
+        if i >= len(self.pool):
+            self.__refill()
+            i = 0
+        self.index = i + 1
+        return self.pool[i]
+
+    def below(self, k):
+        """Return a uniformly random integer in [0, k), for k <= 256."""
+        assert 0 < k <= 256
+        # Rejecting the top 256 % k values keeps each result equally likely.
+        limit = 256 - 256 % k
+        while True:
+            b = self.byte()
+            if b < limit:
+                return b % k
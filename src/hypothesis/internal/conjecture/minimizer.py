@@ -16,7 +16,8 @@
 
 from __future__ import division, print_function, absolute_import
 
-from hypothesis.internal.compat import hbytes, hrange
+from hypothesis.internal.compat import hbytes, hrange, int_to_bytes, \
+    int_from_bytes
 
 
 """
@@ -34,9 +35,20 @@ to do better in practice:
    the answer is not a solution.
 2. No individual byte in the solution may be lowered while holding the others
    fixed.
+
+Blocks of more than one byte are usually integers, so before working on
+individual bytes we treat the block as a big-endian integer and search for the
+smallest value that satisfies the predicate. When the predicate is monotonic
+in that value (as "n is at least some threshold" is) this finds the answer in
+a number of calls proportional to the number of bits in the block, where
+lowering it a byte at a time might take thousands.
 """
 
 
+# How many rejected blocks a single Minimizer remembers.
+REJECTED_CACHE_SIZE = 1024
+
+
 class Minimizer(object):
 
     def __init__(self, initial, condition, random):
@@ -45,15 +57,37 @@ class Minimizer(object):
         self.condition = condition
         self.random = random
         self.changes = 0
+        # Blocks the condition has rejected during this run. The passes below
+        # often propose the same block more than once, e.g. _shrink_index
+        # filling with 255 after trying a value that already did that, and
+        # there is no point asking about those again. Accepted blocks don't
+        # need remembering because everything we try is below the current
+        # block.
+        self.rejected = set()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def incorporate(self, buffer):
         assert isinstance(buffer, hbytes)
         assert len(buffer) == self.size
         assert buffer <= self.current
+        if buffer in self.rejected:
+            self.cache_hits += 1
+            return False
+        self.cache_misses += 1
         if self.condition(buffer):
             self.current = buffer
             self.changes += 1
             return True
+        if len(self.rejected) >= REJECTED_CACHE_SIZE:
+            # Anything above the current block will never be proposed again,
+            # so drop those first and only forget everything if that doesn't
+            # free up any room.
+            self.rejected = set(
+                b for b in self.rejected if b < self.current)
+            if len(self.rejected) >= REJECTED_CACHE_SIZE:
+                self.rejected.clear()
+        self.rejected.add(buffer)
         return False
 
     def _shrink_index(self, i, c):
@@ -76,16 +110,39 @@ class Minimizer(object):
             hbytes([255] * (self.size - i - 1))
         )
 
+    def _shrink_as_integer(self):
+        """Treat the block as a big-endian integer and binary search for the
+        smallest value below it that satisfies the condition.
+
+        Blocks are often already minimal when we get here, so we first check
+        the predecessor of the current value and only search if that works.
+        Zero is known to fail when this is called."""
+        hi = int_from_bytes(self.current)
+        if not self.incorporate(int_to_bytes(hi - 1, self.size)):
+            return
+        hi -= 1
+        lo = 0
+        while lo + 1 < hi:
+            mid = (lo + hi) // 2
+            if self.incorporate(int_to_bytes(mid, self.size)):
+                hi = mid
+            else:
+                lo = mid
+
     def run(self):
         if not any(self.current):
             return
         if self.incorporate(hbytes(self.size)):
             return
-        for c in hrange(max(self.current)):
-            if self.incorporate(
-                hbytes(min(b, c) for b in self.current)
-            ):
-                break
+        changes = self.changes
+        if self.size > 1:
+            self._shrink_as_integer()
+        if self.changes == changes:
+            for c in hrange(max(self.current)):
+                if self.incorporate(
+                    hbytes(min(b, c) for b in self.current)
+                ):
+                    break
 
         change_counter = -1
         while self.current and change_counter < self.changes:
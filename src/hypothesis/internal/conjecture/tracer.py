@@ -0,0 +1,125 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import sys
+
+import hypothesis
+
+
+def _roots(*paths):
+    return tuple(set(
+        os.path.join(os.path.abspath(path), '') for path in paths
+    ))
+
+
+def _install_paths():
+    """Return sysconfig.get_paths(), or as much of it as we need if we don't
+    have sysconfig."""
+    try:
+        import sysconfig
+    except ImportError:  # pragma: no cover
+        # Python 2.6 only has the distutils version of sysconfig.
+        from distutils.sysconfig import get_python_lib
+        return {
+            'stdlib': get_python_lib(standard_lib=True),
+            'platstdlib': get_python_lib(
+                standard_lib=True, plat_specific=True),
+            'purelib': get_python_lib(),
+            'platlib': get_python_lib(plat_specific=True),
+        }
+    return sysconfig.get_paths()
+
+
+INSTALL_PATHS = _install_paths()
+
+IGNORED_ROOTS = _roots(
+    os.path.dirname(hypothesis.__file__),
+    INSTALL_PATHS['stdlib'],
+    INSTALL_PATHS['platstdlib'],
+)
+
+# Installed packages, which may live inside the standard library directory
+# (e.g. on pyenv or in many docker images) but are still user code. If a file
+# is under roots from both sets, the longest one decides.
+TRACED_ROOTS = _roots(
+    INSTALL_PATHS['purelib'],
+    INSTALL_PATHS['platlib'],
+)
+
+# Whether each file we have seen is one we ignore. This is shared between
+# tracers because we create a new one for every example.
+ignored_files = {}
+
+
+def is_ignored(filename):
+    """Return whether code in filename should not be traced."""
+    path = os.path.abspath(filename)
+    best = None
+    for root in IGNORED_ROOTS + TRACED_ROOTS:
+        if path.startswith(root) and (best is None or len(root) > len(best)):
+            best = root
+    return best in IGNORED_ROOTS
+
+
+class Tracer(object):
+    """Records the arcs between lines executed while it is active, as
+    (filename, from_line, to_line) triples, where a from_line of -1 means
+    entry to a function.
+
+    Code that lives inside Hypothesis or the standard library is not traced,
+    both because it is not interesting (in particular it includes the code
+    we use to generate data) and so that we spend as little time in the
+    tracer as possible: The global trace function returns None for such
+    frames, so Python never calls us for their individual lines.
+    """
+
+    def __init__(self):
+        self.arcs = set()
+        self.__previous = None
+
+    def __enter__(self):
+        self.__previous = sys.gettrace()
+        sys.settrace(self.trace)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        sys.settrace(self.__previous)
+        self.__previous = None
+
+    def trace(self, frame, event, arg):
+        if event != 'call':
+            return None
+        filename = frame.f_code.co_filename
+        try:
+            ignored = ignored_files[filename]
+        except KeyError:
+            ignored = is_ignored(filename)
+            ignored_files[filename] = ignored
+        if ignored:
+            return None
+        arcs = self.arcs
+        last = [-1]
+
+        def trace_lines(frame, event, arg):
+            if event == 'line':
+                line = frame.f_lineno
+                arcs.add((filename, last[0], line))
+                last[0] = line
+            return trace_lines
+        return trace_lines
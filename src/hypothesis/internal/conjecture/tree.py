@@ -0,0 +1,158 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis.internal.compat import hbytes, hrange, int_to_bytes, \
+    int_from_bytes
+from hypothesis.internal.conjecture.data import Status
+
+# How many nodes a DataTree will hold. Every block of every test run we see
+# is a node, so for tests that draw many small blocks the tree would otherwise
+# grow without bound.
+MAX_TREE_NODES = 2 ** 14
+
+
+class DataTree(object):
+    """A prefix tree of the blocks drawn by every test run we have seen.
+
+    Assuming the test function is deterministic, the sequence of blocks it
+    draws determines what it does next: How large the next block it asks for
+    is, or whether it stops with some status. Recording this lets us work out
+    what would happen on a buffer without running the test at all, and lets
+    us avoid generating data that would just repeat something we have already
+    tried.
+
+    Nodes are identified by their index. For each node we store the children
+    keyed by the block drawn there, the size of the block that is drawn there
+    if we know it, and the status of the test if it stopped there. A node is
+    dead if every test run through it has been fully explored: Either the
+    test stopped there, or every possible block at it leads to a dead node.
+
+    Once the tree has max_nodes nodes it stops growing: Runs are only
+    recorded as far as they follow paths already in the tree. Nothing is
+    lost but the ability to answer lookups about new paths.
+    """
+
+    def __init__(self, max_nodes=MAX_TREE_NODES):
+        self.max_nodes = max_nodes
+        self.children = [{}]
+        self.block_sizes = {}
+        self.statuses = {}
+        self.dead = set()
+
+    def add(self, data):
+        """Record the blocks drawn by the frozen TestData data and how it
+        ended."""
+        assert data.frozen
+        node = 0
+        path = []
+        u = 0
+        for v in data.block_ends:
+            if node in self.statuses:
+                # We've seen a test stop here before, so the test function
+                # is not deterministic. There's nothing we can usefully
+                # record.
+                return
+            path.append(node)
+            self.block_sizes[node] = v - u
+            block = hbytes(data.buffer[u:v])
+            children = self.children[node]
+            try:
+                node = children[block]
+            except KeyError:
+                if len(self.children) >= self.max_nodes:
+                    return
+                node = len(self.children)
+                self.children.append({})
+                children[block] = node
+            u = v
+        if data.status == Status.OVERRUN:
+            self.block_sizes[node] = (
+                data.max_length - data.index + data.overdraw)
+            return
+        if self.children[node]:
+            return
+        self.statuses[node] = data.status
+        self.dead.add(node)
+        for node in reversed(path):
+            children = self.children[node]
+            if (
+                len(children) < 256 ** self.block_sizes[node] or
+                not self.dead.issuperset(children.values())
+            ):
+                break
+            self.dead.add(node)
+
+    def lookup(self, buffer):
+        """Return the status that running the test on buffer would produce,
+        or None if we can't tell without running it."""
+        node = 0
+        i = 0
+        while True:
+            try:
+                return self.statuses[node]
+            except KeyError:
+                pass
+            try:
+                n = self.block_sizes[node]
+            except KeyError:
+                return None
+            if i + n > len(buffer):
+                return Status.OVERRUN
+            try:
+                node = self.children[node][hbytes(buffer[i:i + n])]
+            except KeyError:
+                return None
+            i += n
+
+    def avoid_dead(self, draw_bytes):
+        """Wrap draw_bytes, a function used to draw blocks for a single
+        TestData, so that the blocks it produces do not lead into any part of
+        the tree that has been fully explored.
+
+        Blocks that would are incremented (as big-endian integers) until they
+        reach a live or unexplored node. Once the data has left the known part
+        of the tree the blocks are passed through unchanged.
+        """
+        state = [0]
+
+        def accept(data, n, distribution):
+            result = draw_bytes(data, n, distribution)
+            node = state[0]
+            if node is None:
+                return result
+            if self.block_sizes.get(node, n) != n or node in self.dead:
+                state[0] = None
+                return result
+            children = self.children[node]
+            result = hbytes(result)
+            k = int_from_bytes(result)
+            for _ in hrange(len(children) + 1):
+                child = children.get(result)
+                if child is None:
+                    state[0] = None
+                    return result
+                if child not in self.dead:
+                    state[0] = child
+                    return result
+                k = (k + 1) % (256 ** n)
+                result = int_to_bytes(k, n)
+            # This can only happen if the test function is not deterministic,
+            # in which case the tree can't help us here.
+            state[0] = None  # pragma: no cover
+            return result  # pragma: no cover
+        return accept
@@ -0,0 +1,164 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Support for running parts of the conjecture engine in forked worker
+processes.
+
+Workers are created with os.fork rather than through multiprocessing so
+that they inherit the test function and the runner state as they are,
+without anything needing to be picklable. Only the results a worker sends
+back to its parent have to be.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import sys
+import errno
+import pickle
+import select
+import signal
+import multiprocessing
+
+from hypothesis.internal.compat import WINDOWS
+
+CAN_FORK = hasattr(os, 'fork') and not WINDOWS
+
+
+class SharedCounters(object):
+    """Example counts that are shared between a parent process and the
+    workers forked from it after the counters were created.
+
+    Each worker has a slot of its own in shared memory that only it writes
+    to, and totals are the sum over every slot. There is deliberately no
+    lock: workers may be killed at any point, and one killed while holding a
+    lock would leave everyone else waiting on it forever. A total read while
+    a worker is writing may be off by that worker's latest example, which is
+    fine for deciding when to stop.
+    """
+
+    def __init__(self, workers, iterations=0, valid_examples=0):
+        self.base = (iterations, valid_examples)
+        self.counts = multiprocessing.RawArray('l', 2 * workers)
+        self.slot = None
+
+    def record(self, valid):
+        """Count one more example in this worker's slot, which is valid if
+        valid is True, and return the global (iterations, valid_examples)
+        totals.
+
+        Must be called from a worker, after setting slot to its index."""
+        i = 2 * self.slot
+        self.counts[i] += 1
+        if valid:
+            self.counts[i + 1] += 1
+        return self.totals()
+
+    def totals(self):
+        counts = self.counts[:]
+        return (
+            self.base[0] + sum(counts[::2]),
+            self.base[1] + sum(counts[1::2]),
+        )
+
+
+class Worker(object):
+
+    def __init__(self, function):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            # We're the child. Nothing we do here may return control to the
+            # caller, so every path out goes through os._exit.
+            os.close(read_fd)
+            exit_code = 1
+            try:
+                payload = pickle.dumps(
+                    function(), pickle.HIGHEST_PROTOCOL)
+                while payload:
+                    written = os.write(write_fd, payload)
+                    payload = payload[written:]
+                exit_code = 0
+            except BaseException:
+                pass
+            finally:
+                try:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                finally:
+                    os._exit(exit_code)
+        os.close(write_fd)
+        self.pid = pid
+        self.fd = read_fd
+        self.chunks = []
+
+    def read(self):
+        """Read whatever is available from the worker. Returns True once the
+        worker has closed its end of the pipe."""
+        chunk = os.read(self.fd, 65536)
+        if chunk:
+            self.chunks.append(chunk)
+            return False
+        return True
+
+    def result(self):
+        """Reap the worker and return the value its function returned, or
+        None if it died without returning one."""
+        self.close()
+        _, status = os.waitpid(self.pid, 0)
+        if status != 0 or not self.chunks:
+            return None
+        return pickle.loads(b''.join(self.chunks))
+
+    def kill(self):
+        self.close()
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except OSError as e:  # pragma: no cover
+            if e.errno != errno.ESRCH:
+                raise
+        os.waitpid(self.pid, 0)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def results_as_completed(functions):
+    """Run each of functions in its own forked worker and yield their return
+    values in the order the workers finish (None for any worker that died
+    without producing a value).
+
+    If the generator is closed before it is exhausted, any workers which are
+    still running are killed.
+    """
+    workers = [Worker(f) for f in functions]
+    running = list(workers)
+    try:
+        while running:
+            ready, _, _ = select.select(
+                [w.fd for w in running], [], [])
+            for fd in ready:
+                worker = [w for w in running if w.fd == fd][0]
+                if worker.read():
+                    running.remove(worker)
+                    yield worker.result()
+    finally:
+        for worker in running:
+            worker.kill()
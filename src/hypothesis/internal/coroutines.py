@@ -0,0 +1,88 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis.internal.reflection import proxies
+
+try:
+    import asyncio
+    from inspect import iscoroutinefunction
+except ImportError:  # pragma: no cover
+    asyncio = None
+
+    def iscoroutinefunction(function):
+        return False
+
+
+class EventLoop(object):
+    """The event loop that every example in one run of an async test runs on,
+    so that we only pay for setting one up once.
+
+    A new loop is created when the outermost with block using this is entered
+    and closed when it exits.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.depth = 0
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.loop = asyncio.new_event_loop()
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.depth -= 1
+        if self.depth == 0:
+            self.loop.close()
+            self.loop = None
+
+    def run(self, coroutine):
+        """Run coroutine to completion and return its result.
+
+        If we are interrupted (e.g. by a deadline) the coroutine is cancelled,
+        so that it does not carry on running during later examples.
+        """
+        task = self.loop.create_task(coroutine)
+        try:
+            return self.loop.run_until_complete(task)
+        except BaseException:
+            if not task.done():
+                task.cancel()
+                try:
+                    self.loop.run_until_complete(task)
+                except BaseException:
+                    pass
+            raise
+
+    def run_concurrently(self, coroutines):
+        """Run coroutines at the same time, and return a list of what each
+        one returned or the exception it raised."""
+        tasks = [self.loop.create_task(c) for c in coroutines]
+        if not tasks:
+            return []
+        return self.loop.run_until_complete(
+            asyncio.gather(*tasks, return_exceptions=True))
+
+    def synchronous(self, function):
+        """Return a function with the same signature as the coroutine function
+        function which runs it to completion on this loop."""
+        @proxies(function)
+        def run(*args, **kwargs):
+            return self.run(function(*args, **kwargs))
+        return run
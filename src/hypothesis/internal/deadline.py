@@ -0,0 +1,71 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import signal
+from contextlib import contextmanager
+
+from hypothesis.errors import DeadlineExceeded
+
+
+@contextmanager
+def deadline(milliseconds):
+    """Raise DeadlineExceeded in the current thread if the body of the with
+    block is still running after this many milliseconds. If milliseconds is
+    None, or we have no way of interrupting the thread, this does nothing.
+
+    Any timer that was already running (for example one set by a test that
+    itself uses signal.alarm) is restored afterwards with the time it had
+    left, so deadlines nest.
+    """
+    if milliseconds is None or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    seconds = milliseconds / 1000.0
+    start = time.time()
+
+    def handler(signum, frame):
+        raise DeadlineExceeded(
+            'Example ran for %.2fms, which exceeds the deadline of %.2fms' % (
+                (time.time() - start) * 1000, milliseconds))
+
+    try:
+        old_handler = signal.signal(signal.SIGALRM, handler)
+    except ValueError:
+        # Signal handlers can only be installed from the main thread.
+        old_handler = handler
+    if old_handler is handler:
+        yield
+        return
+    old_delay, old_interval = signal.setitimer(signal.ITIMER_REAL, seconds)
+    active = True
+    if old_delay and old_delay < seconds:
+        # The outer timer is due first, so let it fire as it would have.
+        signal.signal(signal.SIGALRM, old_handler)
+        signal.setitimer(signal.ITIMER_REAL, old_delay, old_interval)
+        active = False
+    try:
+        yield
+    finally:
+        if active:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, old_handler)
+            if old_delay:
+                remaining = max(old_delay - (time.time() - start), 1e-6)
+                signal.setitimer(
+                    signal.ITIMER_REAL, remaining, old_interval)
@@ -0,0 +1,63 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from contextlib import contextmanager
+
+from hypothesis.errors import MemoryLimitExceeded
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+
+@contextmanager
+def memory_limit(limit):
+    """Raise MemoryLimitExceeded when the body of the with block finishes if,
+    at its peak, it had allocated more than limit bytes more than it started
+    with. If limit is None, or we have no way of measuring this, this does
+    nothing.
+
+    This uses tracemalloc, which only sees memory allocated through Python's
+    allocators, and makes allocation noticeably slower while it is on.
+    """
+    if limit is None or tracemalloc is None:
+        yield
+        return
+    if tracemalloc.is_tracing():
+        # Someone else is tracing already, so we must leave tracing on, and
+        # can only measure our own peak if we can reset theirs.
+        if not hasattr(tracemalloc, 'reset_peak'):
+            yield
+            return
+        tracemalloc.reset_peak()
+        stop = False
+    else:
+        tracemalloc.start()
+        stop = True
+    try:
+        initial, _ = tracemalloc.get_traced_memory()
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if stop:
+            tracemalloc.stop()
+    if peak - initial > limit:
+        raise MemoryLimitExceeded(
+            'Example allocated %d bytes at its peak, which exceeds the '
+            'memory_limit of %d bytes' % (peak - initial, limit))
@@ -18,7 +18,7 @@ from __future__ import division, print_function, absolute_import
 
 import hypothesis.internal.conjecture.utils as cu
 from hypothesis.errors import NoExamples, NoSuchExample, Unsatisfiable, \
-    UnsatisfiedAssumption
+    InvalidArgument, UnsatisfiedAssumption
 from hypothesis.control import assume, reject
 from hypothesis.internal.compat import hrange
 from hypothesis.internal.reflection import get_pretty_function_description
@@ -119,6 +119,59 @@ class SearchStrategy(object):
                 u'Could not find any valid examples in 100 tries'
             )
 
+    def stream(self, seed=None, n=None):
+        """Return an iterator over values generated from this strategy,
+        which yields n of them, or goes on forever if n is None.
+
+        This is for using strategies as a source of data, e.g. for load tests,
+        so unlike example() there is no shrinking, database or health checks:
+        Each value is drawn once from fresh random data, as quickly as we
+        can. Values that are rejected (e.g. by filter) are skipped. If seed
+        is not None, the same seed always produces the same values.
+
+        This method is part of the public API.
+
+        """
+        from random import Random
+        from hypothesis._settings import settings
+        from hypothesis.control import BuildContext
+        from hypothesis.internal.conjecture.data import TestData, StopTest, \
+            uniform
+        from hypothesis.internal.conjecture.entropy import EntropyPool
+
+        if n is not None and n < 0:
+            raise InvalidArgument('n=%r must not be negative' % (n,))
+        self.validate()
+        random = Random(seed)
+        entropy = EntropyPool(random)
+        buffer_size = settings.default.buffer_size
+
+        def draw_bytes(data, n, distribution):
+            if distribution is uniform:
+                return entropy.draw(n)
+            return distribution(random, n)
+
+        def generate():
+            count = 0
+            rejections = 0
+            while n is None or count < n:
+                data = TestData(
+                    max_length=buffer_size, draw_bytes=draw_bytes)
+                try:
+                    with BuildContext():
+                        value = data.draw(self)
+                except (UnsatisfiedAssumption, StopTest):
+                    rejections += 1
+                    if rejections >= 1000:
+                        raise NoExamples(
+                            u'Could not find any valid examples in %d '
+                            u'tries' % (rejections,))
+                    continue
+                rejections = 0
+                count += 1
+                yield value
+        return generate()
+
     def map(self, pack):
         """Returns a new strategy that generates values by generating a value
         from this strategy and then calling pack() on the result, giving that.
@@ -0,0 +1,142 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+"""Statistics about how Hypothesis spent its time running a test.
+
+Every run of the Hypothesis engine produces a Statistics object. To get hold
+of them, run your tests inside with_collector(callback), and callback will be
+called with the Statistics for each run. If the record_statistics setting is
+True they are also written as JSON to the statistics directory in the
+Hypothesis storage directory, one file per test.
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import json
+import hashlib
+
+from hypothesis.configuration import storage_directory
+from hypothesis.utils.dynamicvariables import DynamicVariable
+
+
+class PassStatistics(object):
+    """Counters for one of the passes the shrinker makes over a failing
+    example, summed over every time that pass was run.
+
+    - calls is the number of times the test function was called
+    - shrinks is the number of those calls that produced a smaller
+      failing example
+    - bytes_saved is how much shorter the example's buffer got
+    - runtime is the wall clock time in seconds spent in the pass
+    - minimizer_cache_hits is the number of blocks the pass's block
+      minimizers skipped because they had already been rejected, and
+      minimizer_cache_misses the number they had to try
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.shrinks = 0
+        self.bytes_saved = 0
+        self.runtime = 0.0
+        self.minimizer_cache_hits = 0
+        self.minimizer_cache_misses = 0
+
+    def __repr__(self):
+        return (
+            'PassStatistics(%r, calls=%d, shrinks=%d, bytes_saved=%d, '
+            'runtime=%.2f, minimizer_cache_hits=%d, '
+            'minimizer_cache_misses=%d)'
+        ) % (
+            self.name, self.calls, self.shrinks, self.bytes_saved,
+            self.runtime, self.minimizer_cache_hits,
+            self.minimizer_cache_misses,
+        )
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'shrinks': self.shrinks,
+            'bytes_saved': self.bytes_saved,
+            'runtime': self.runtime,
+            'minimizer_cache_hits': self.minimizer_cache_hits,
+            'minimizer_cache_misses': self.minimizer_cache_misses,
+        }
+
+
+class Statistics(object):
+    """Statistics for a single run of the Hypothesis engine.
+
+    - iterations is the number of times the test function was called
+    - valid_examples is how many of those calls satisfied all assumptions
+    - shrinks is the number of successful shrinks of a failing example
+    - shrink_passes is a list of PassStatistics, one for each shrink pass
+      that ran, in the order they first ran
+
+    """
+
+    def __init__(self, iterations, valid_examples, shrinks, shrink_passes):
+        self.iterations = iterations
+        self.valid_examples = valid_examples
+        self.shrinks = shrinks
+        self.shrink_passes = list(shrink_passes)
+
+    def __repr__(self):
+        return (
+            'Statistics(iterations=%d, valid_examples=%d, shrinks=%d, '
+            'shrink_passes=%r)'
+        ) % (
+            self.iterations, self.valid_examples, self.shrinks,
+            self.shrink_passes,
+        )
+
+    def as_dict(self):
+        return {
+            'iterations': self.iterations,
+            'valid_examples': self.valid_examples,
+            'shrinks': self.shrinks,
+            'shrink_passes': [p.as_dict() for p in self.shrink_passes],
+        }
+
+
+collector = DynamicVariable(None)
+
+
+def with_collector(callback):
+    return collector.with_value(callback)
+
+
+def note_statistics(statistics):
+    callback = collector.value
+    if callback is not None:
+        callback(statistics)
+
+
+def statistics_file(key):
+    return os.path.join(
+        storage_directory('statistics'),
+        hashlib.sha1(key).hexdigest()[:16] + '.json'
+    )
+
+
+def save_statistics(key, statistics):
+    """Write statistics as JSON to the statistics file for the test with
+    database key key, replacing any previous statistics for it."""
+    with open(statistics_file(key), 'w') as o:
+        json.dump(statistics.as_dict(), o, indent=4, sort_keys=True)
@@ -0,0 +1,263 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import pytest
+
+from hypothesis import seed, given, assume, batched, example, settings, \
+    Verbosity
+from hypothesis.errors import ExampleFailed, Unsatisfiable, \
+    InvalidArgument
+from hypothesis.strategies import integers
+from tests.common.utils import capture_out
+
+
+def test_passes_the_test_batches_of_examples():
+    sizes = []
+
+    @given(integers())
+    @batched(50)
+    @settings(max_examples=200, database=None)
+    def test(xs):
+        assert isinstance(xs, list)
+        sizes.append(len(xs))
+
+    test()
+    assert max(sizes) == 50
+    assert sum(sizes) >= 200
+
+
+def test_shrinks_the_example_the_test_reports():
+    calls = []
+
+    @seed(0)
+    @given(integers(0, 10 ** 6))
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        calls.append(len(xs))
+        return [i for i, x in enumerate(xs) if x >= 900000]
+
+    with pytest.raises(ExampleFailed):
+        test()
+    assert max(calls) == 20
+    assert calls[-1] == 1
+
+
+def test_reports_the_failing_example_on_its_own(capsys):
+    @given(integers(0, 1000))
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        return [i for i, x in enumerate(xs) if x >= 10]
+
+    with pytest.raises(ExampleFailed):
+        test()
+    out, _ = capsys.readouterr()
+    assert 'test(xs=10)' in out
+
+
+def test_finds_the_example_that_raised_in_a_batch(capsys):
+    @given(integers(0, 1000))
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        for x in xs:
+            assert x < 10
+
+    with pytest.raises(AssertionError):
+        test()
+    out, _ = capsys.readouterr()
+    assert 'test(xs=10)' in out
+
+
+def test_batched_tests_may_return_nothing_for_success():
+    @given(integers())
+    @batched(10)
+    def test(xs):
+        return None
+
+    test()
+
+
+def test_batched_tests_can_mix_fixed_and_generated_arguments():
+    @given(y=integers())
+    @batched(10)
+    @settings(database=None)
+    def test(x, y):
+        assert x == 1
+        assert isinstance(y, list)
+
+    test(1)
+
+
+def test_runs_explicit_examples_as_a_batch_of_one():
+    seen = []
+
+    @given(integers())
+    @example(7)
+    @batched(10)
+    @settings(max_examples=1, database=None)
+    def test(xs):
+        seen.append(xs)
+
+    test()
+    assert seen[0] == [7]
+
+
+def test_assumptions_in_batch_of_one():
+    @given(integers())
+    @batched(10)
+    @settings(database=None)
+    def test(xs):
+        if len(xs) == 1:
+            assume(xs[0] % 2 == 0)
+
+    test()
+
+
+def test_must_be_applied_before_given():
+    def test(xs):
+        pass
+
+    with pytest.raises(InvalidArgument):
+        batched(10)(given(integers())(test))
+
+
+def test_rejects_empty_batches():
+    with pytest.raises(InvalidArgument):
+        batched(0)
+
+
+def test_runs_batches_of_one_when_there_is_a_deadline():
+    sizes = []
+
+    @given(integers())
+    @batched(50)
+    @settings(max_examples=100, deadline=1000, database=None)
+    def test(xs):
+        sizes.append(len(xs))
+
+    test()
+    assert set(sizes) == {1}
+
+
+def test_reports_each_example_in_a_batch_when_verbose():
+    @given(integers())
+    @batched(10)
+    @settings(
+        max_examples=20, verbosity=Verbosity.verbose, database=None)
+    def test(xs):
+        pass
+
+    with capture_out() as out:
+        test()
+    assert out.getvalue().count('Trying example') >= 20
+
+
+@pytest.mark.parametrize('index', [-1, 20, 1.5, True, '0'])
+def test_rejects_indices_outside_the_batch(index):
+    @given(integers())
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        return [index]
+
+    with pytest.raises(InvalidArgument):
+        test()
+
+
+def test_rejects_indices_outside_a_batch_of_one():
+    @example(0)
+    @given(integers())
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        return [1]
+
+    with pytest.raises(InvalidArgument):
+        test()
+
+
+@pytest.mark.parametrize('result', [True, 0, object()])
+def test_rejects_results_that_are_not_collections(result):
+    @given(integers())
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        return result
+
+    with pytest.raises(InvalidArgument):
+        test()
+
+
+def test_reports_each_failing_index_once():
+    @given(integers())
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        return [len(xs) - 1] * 2
+
+    with pytest.raises(ExampleFailed):
+        test()
+
+
+def test_checks_examples_one_at_a_time_when_the_batch_raises(capsys):
+    raised = []
+
+    @seed(0)
+    @given(integers(0, 1000))
+    @batched(20)
+    @settings(database=None)
+    def test(xs):
+        if len(xs) > 1:
+            if any(x >= 900 for x in xs):
+                raised.append(xs)
+                raise ValueError()
+            return
+        assert xs[0] < 900
+
+    with pytest.raises(AssertionError):
+        test()
+    assert raised
+    out, _ = capsys.readouterr()
+    assert 'test(xs=900)' in out
+
+
+def test_reports_errors_drawing_examples_for_a_batch():
+    @given(integers(0, 100).map(lambda x: 1 // (x % 10)))
+    @batched(20)
+    @settings(perform_health_check=False, database=None)
+    def test(xs):
+        pass
+
+    with pytest.raises(ZeroDivisionError):
+        test()
+
+
+def test_skips_batches_where_no_example_could_be_drawn():
+    def reject(x):
+        assume(False)
+
+    @given(integers().map(reject))
+    @batched(2)
+    @settings(perform_health_check=False, database=None)
+    def test(xs):
+        raise AssertionError()
+
+    with pytest.raises(Unsatisfiable):
+        test()
@@ -19,13 +19,21 @@ from __future__ import division, print_function, absolute_import
 import time
 from random import Random
 
+import pytest
+
 from hypothesis import strategies as st
 from hypothesis import given, Phase, settings
+from hypothesis.errors import AbnormalExit
 from hypothesis.database import ExampleDatabase
 from hypothesis.internal.compat import hbytes, int_from_bytes, \
-    bytes_from_list
+    bytes_from_list, Counter
 from hypothesis.internal.conjecture.data import Status, TestData
-from hypothesis.internal.conjecture.engine import TestRunner
+from hypothesis.internal.conjecture import engine
+from hypothesis.internal.conjecture.engine import Splice, TestRunner, \
+    BlockIndex, ShrinkPass, ReplacementIndex, sort_key, materialise, \
+    RunIsComplete, coverage_key, smallest_intervals, \
+    schedule_shrink_passes, REPLACEMENT_ALTERNATIVES
+from hypothesis.internal.conjecture.workers import CAN_FORK, SharedCounters
 
 MAX_SHRINKS = 2000
 
@@ -486,3 +494,860 @@ def test_maliciously_bad_generator(rnd, seed):
             data.mark_invalid()
         else:
             data.mark_interesting()
+
+
+needs_fork = pytest.mark.skipif(not CAN_FORK, reason='os.fork unavailable')
+
+
+@needs_fork
+def test_can_generate_in_multiple_processes():
+    def f(data):
+        if sum(data.draw_bytes(4)) >= 600:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=5000, max_iterations=10000, generate_processes=4,
+        database=None,
+    ))
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+    assert sum(runner.last_data.buffer) == 600
+
+
+@needs_fork
+def test_counts_examples_across_processes():
+    def f(data):
+        data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=100, generate_processes=4, database=None,
+    ))
+    runner.run()
+    assert runner.last_data.status == Status.VALID
+    assert 100 <= runner.valid_examples <= 100 + 4 + 1
+
+
+def test_generating_as_a_worker_counts_examples_in_its_slot():
+    def f(data):
+        data.draw_bytes(1)
+
+    runner = TestRunner(
+        f, settings=settings(max_examples=50, database=None),
+        database_key=b'key')
+    counters = SharedCounters(2, iterations=3, valid_examples=2)
+    status, _ = runner._generate_as_worker(counters, 1, Random(0))
+    assert status == Status.VALID
+    assert runner.database_key is None
+    assert counters.counts[0] == counters.counts[1] == 0
+    assert counters.counts[2] == runner.iterations - 3
+    assert counters.counts[3] == runner.valid_examples - 2
+    assert counters.totals() == (runner.iterations, runner.valid_examples)
+
+
+def test_generating_as_a_worker_returns_the_interesting_example():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 200:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    status, buffer = runner._generate_as_worker(
+        SharedCounters(1), 0, Random(0))
+    assert status == Status.INTERESTING
+    assert buffer[0] >= 200
+
+
+def test_generating_as_a_worker_returns_the_example_that_raised():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 200:
+            raise ValueError()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    status, buffer = runner._generate_as_worker(
+        SharedCounters(1), 0, Random(0))
+    assert status is None
+    assert buffer[0] >= 200
+
+
+@needs_fork
+def test_killing_workers_does_not_hang_later_runs():
+    # Workers are killed as soon as one of them finds a failure, which can
+    # happen while they are updating the shared counts.
+    def f(data):
+        if data.draw_bytes(1)[0] == 255:
+            data.mark_interesting()
+
+    for _ in range(100):
+        runner = TestRunner(f, settings=settings(
+            generate_processes=8, database=None,
+        ))
+        runner.run()
+        if runner.last_data.status == Status.INTERESTING:
+            assert runner.last_data.buffer == hbytes([255])
+
+
+@needs_fork
+def test_reraises_errors_from_worker_processes():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 128:
+            raise ValueError()
+
+    runner = TestRunner(f, settings=settings(
+        generate_processes=2, database=None,
+    ))
+    with pytest.raises(ValueError):
+        runner.run()
+
+
+@needs_fork
+def test_can_shrink_in_multiple_processes():
+    def f(data):
+        x = data.draw_bytes(10)
+        if sum(x) >= 300:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=5000, max_iterations=10000, shrink_processes=4,
+        database=None,
+    ))
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+    assert runner.last_data.buffer == hbytes([0] * 8 + [45, 255])
+
+
+@needs_fork
+def test_shrinking_in_processes_matches_shrinking_serially(monkeypatch):
+    def f(data):
+        total = 0
+        while True:
+            b = data.draw_bytes(1)[0]
+            if b == 0:
+                break
+            total += b
+        if total >= 1000:
+            data.mark_interesting()
+
+    parallel_calls = [0]
+    incorporate_in_processes = TestRunner._incorporate_in_processes
+
+    def counting(self, candidates):
+        parallel_calls[0] += 1
+        return incorporate_in_processes(self, candidates)
+    monkeypatch.setattr(TestRunner, '_incorporate_in_processes', counting)
+
+    def run(processes):
+        runner = TestRunner(f, settings=settings(
+            max_examples=5000, max_iterations=10000,
+            shrink_processes=processes, database=None,
+        ), random=Random(0))
+        runner.run()
+        assert runner.last_data.status == Status.INTERESTING
+        return runner.last_data.buffer, runner.iterations
+
+    serial = run(1)
+    for _ in range(4):
+        assert run(4) == serial
+    assert parallel_calls[0] > 0
+
+
+def test_runs_shrink_candidates_until_one_is_interesting():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 5:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    assert runner._run_shrink_candidates(
+        [hbytes([1]), hbytes([7]), hbytes([9])]
+    ) == [(Status.VALID, hbytes([1])), (Status.INTERESTING, hbytes([7]))]
+
+
+def test_runs_shrink_candidates_until_one_raises():
+    def f(data):
+        if data.draw_bytes(1)[0] == 3:
+            raise ValueError()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    assert runner._run_shrink_candidates(
+        [hbytes([1]), hbytes([3]), hbytes([4])]
+    ) == [(Status.VALID, hbytes([1])), (None, hbytes([3]))]
+
+
+def test_best_shrink_result_stops_once_nothing_pending_can_beat_it():
+    chunks = [
+        [hbytes([1]), hbytes([3])],
+        [hbytes([2]), hbytes([4])],
+        [hbytes([5]), hbytes([6])],
+    ]
+
+    def results():
+        yield 1, [(Status.INTERESTING, hbytes([2]))]
+        yield None
+        yield 0, [(Status.VALID, hbytes([1])), (None, hbytes([3]))]
+        assert False, 'Waited on a worker that could not help'
+
+    runner = TestRunner(lambda data: None, settings=settings(database=None))
+    best, evaluated = runner._best_shrink_result(chunks, results())
+    assert best == hbytes([2])
+    assert len(evaluated) == 3
+
+
+def test_best_shrink_result_may_be_an_error():
+    chunks = [[hbytes([1])], [hbytes([2])]]
+    results = [
+        (1, [(Status.INTERESTING, hbytes([2]))]),
+        (0, [(None, hbytes([1]))]),
+    ]
+    runner = TestRunner(lambda data: None, settings=settings(database=None))
+    assert runner._best_shrink_result(chunks, results) == (
+        hbytes([1]), results[0][1] + results[1][1])
+
+
+def shrinking_runner(**kwargs):
+    def f(data):
+        if sum(data.draw_bytes(2)) >= 10:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None, **kwargs))
+    runner.last_data = TestData.for_buffer(hbytes([10, 10]))
+    runner.test_function(runner.last_data)
+    runner.shrink_start_time = time.time()
+    runner.shrink_start_iterations = runner.iterations
+    return runner
+
+
+def test_records_best_shrink_result_and_counts_it_once():
+    runner = shrinking_runner()
+    evaluated = [
+        (Status.VALID, hbytes([0, 1])), (Status.INTERESTING, hbytes([5, 5]))]
+    assert runner._record_shrink_results(hbytes([5, 5]), evaluated)
+    assert runner.last_data.buffer == hbytes([5, 5])
+    assert runner.iterations - runner.shrink_start_iterations == 2
+    assert hbytes([0, 1]) in runner.seen
+
+
+def test_records_best_shrink_result_when_out_of_shrink_budget():
+    runner = shrinking_runner(shrink_time_limit=1)
+    runner.shrink_start_time -= 10
+    assert runner._record_shrink_results(
+        hbytes([5, 5]), [(Status.INTERESTING, hbytes([5, 5]))])
+    assert runner.last_data.buffer == hbytes([5, 5])
+
+
+def test_records_shrink_results_with_no_best():
+    runner = shrinking_runner()
+    assert not runner._record_shrink_results(
+        None, [(Status.VALID, hbytes([0, 1]))])
+    assert runner.last_data.buffer == hbytes([10, 10])
+    assert hbytes([0, 1]) in runner.seen
+
+
+@needs_fork
+def test_only_runs_shrink_candidates_the_budget_allows():
+    runner = shrinking_runner(max_shrink_calls=1, shrink_processes=2)
+    assert runner._incorporate_in_processes(
+        [hbytes([5, 5]), hbytes([6, 6]), hbytes([7, 7])])
+    assert runner.last_data.buffer == hbytes([5, 5])
+    assert runner.iterations - runner.shrink_start_iterations == 1
+
+
+def test_does_not_run_shrink_candidates_after_timeout():
+    runner = shrinking_runner(timeout=1, shrink_processes=2)
+    runner.start_time -= 10
+    with pytest.raises(RunIsComplete):
+        runner._incorporate_in_processes([hbytes([5, 5]), hbytes([6, 6])])
+
+
+def test_replays_errors_from_shrink_results():
+    def f(data):
+        if data.draw_bytes(1)[0] == 3:
+            raise ValueError()
+        data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    runner.last_data = TestData.for_buffer(hbytes([10]))
+    runner.test_function(runner.last_data)
+    with pytest.raises(ValueError):
+        runner._record_shrink_results(hbytes([3]), [(None, hbytes([3]))])
+
+
+@needs_fork
+def test_reraises_errors_from_shrinking_processes():
+    def f(data):
+        x = data.draw_bytes(10)
+        if sum(x) >= 300:
+            data.mark_interesting()
+        if sum(x) >= 200 and not any(x[:5]):
+            raise ValueError()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=5000, max_iterations=10000, shrink_processes=4,
+        database=None,
+    ))
+    with pytest.raises(ValueError):
+        runner.run()
+
+
+def test_schedules_untried_passes_in_order():
+    passes = [ShrinkPass(name, None) for name in 'abc']
+    assert schedule_shrink_passes(passes, run_all=False) == passes
+
+
+def test_schedules_passes_that_pay_off_first():
+    a, b, c = passes = [ShrinkPass(name, None) for name in 'abc']
+    a.record(calls=100, shrinks=1)
+    b.record(calls=10, shrinks=5)
+    c.record(calls=20, shrinks=2)
+    assert schedule_shrink_passes(passes, run_all=False) == [b, c, a]
+
+
+def test_skips_passes_that_keep_failing_unless_running_all():
+    a, b = passes = [ShrinkPass(name, None) for name in 'ab']
+    for _ in range(3):
+        a.record(calls=10, shrinks=0)
+        b.record(calls=10, shrinks=1)
+    assert schedule_shrink_passes(passes, run_all=False) == [b]
+    assert schedule_shrink_passes(passes, run_all=True) == [b, a]
+    a.record(calls=10, shrinks=1)
+    assert a in schedule_shrink_passes(passes, run_all=False)
+
+
+def test_runs_every_shrink_pass_before_finishing():
+    def f(data):
+        if sum(hbytes(data.draw_bytes(20))) >= 500:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+    assert len(runner.pass_statistics) == 8
+
+
+def test_deletes_large_chunks_in_few_calls():
+    def f(data):
+        while True:
+            b = data.draw_bytes(1)[0]
+            if b == 255:
+                data.mark_interesting()
+            if b == 0:
+                break
+
+    runner = TestRunner(f, settings=settings(database=None))
+    runner.last_data = TestData.for_buffer(hbytes([1] * 1000 + [255]))
+    runner.test_function(runner.last_data)
+    assert runner.last_data.status == Status.INTERESTING
+    initial_calls = runner.iterations
+    runner.delete_bytes()
+    assert runner.last_data.buffer == hbytes([255])
+    assert runner.iterations - initial_calls <= 50
+
+
+def test_coverage_guided_keeps_examples_that_reach_new_code():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 128:
+            if data.draw_bytes(1)[0] >= 128:
+                data.mark_invalid()
+
+    runner = TestRunner(f, settings=settings(
+        database=None, max_examples=200, coverage_guided=True))
+    runner.run()
+    assert runner.covered
+    assert 1 <= len(runner.coverage_corpus) <= 3
+    lengths = set(len(d.buffer) for d in runner.coverage_corpus)
+    assert len(lengths) == len(runner.coverage_corpus)
+
+
+def test_does_not_trace_unless_coverage_guided():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 128:
+            data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        database=None, max_examples=200))
+    runner.run()
+    assert not runner.covered
+    assert not runner.coverage_corpus
+
+
+def test_coverage_guided_finds_deeply_nested_failure():
+    def f(data):
+        for _ in range(4):
+            data.draw_bytes(1)
+            if data.draw_bytes(1)[0] < 224:
+                return
+        data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        database=None, max_examples=5000, max_iterations=5000,
+        coverage_guided=True), random=Random(0))
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+
+
+def test_saves_coverage_corpus_and_starts_from_it_next_time():
+    key = b'key'
+    db = ExampleDatabase(':memory:')
+
+    def f(data):
+        if data.draw_bytes(1)[0] >= 128:
+            data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        database=db, max_examples=200, coverage_guided=True
+    ), database_key=key)
+    runner.run()
+    saved = set(db.fetch(coverage_key(key)))
+    assert saved == set(d.buffer for d in runner.coverage_corpus)
+    assert not list(db.fetch(key))
+
+    runner = TestRunner(f, settings=settings(
+        database=db, max_examples=200, coverage_guided=True
+    ), database_key=key)
+    runner.run()
+    assert [d.buffer for d in runner.coverage_corpus] == sorted(
+        saved, key=lambda b: (len(b), b))
+    assert set(db.fetch(coverage_key(key))) == saved
+
+
+def test_drops_saved_examples_that_reach_no_new_code():
+    key = b'key'
+    db = ExampleDatabase(':memory:')
+    for i in range(10):
+        db.save(coverage_key(key), hbytes([i]))
+
+    def f(data):
+        data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        database=db, max_examples=100, coverage_guided=True
+    ), database_key=key)
+    runner.run()
+    assert list(db.fetch(coverage_key(key))) == [hbytes([0])]
+
+
+def test_does_not_save_coverage_corpus_unless_coverage_guided():
+    key = b'key'
+    db = ExampleDatabase(':memory:')
+
+    def f(data):
+        data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        database=db, max_examples=100), database_key=key)
+    runner.run()
+    assert not list(db.fetch(coverage_key(key)))
+
+
+def test_splice_describes_an_edited_buffer():
+    buf = hbytes(b'abcdef')
+    s = Splice(buf, 1, 3, hbytes(b'x'))
+    assert len(s) == 5
+    assert s.buffer == b'axdef'
+    assert s[1] == s.buffer[1]
+
+
+def test_splices_of_the_same_site_compare_without_building():
+    buf = hbytes(b'abcdef')
+    splices = [Splice(buf, 1, 3, hbytes(c)) for c in (b'zz', b'aa', b'bc')]
+    assert sorted(splices + [buf], key=sort_key)[0].replacement == b'aa'
+    assert splices[2] == buf
+    assert all(s._buffer is None for s in splices)
+
+
+@pytest.mark.parametrize('u, v, r', [
+    (0, 1, b''), (2, 4, b'q'), (1, 2, b'\0'), (3, 3, b'xyz'),
+])
+def test_splices_compare_like_their_buffers(u, v, r):
+    buf = hbytes(b'abcdef')
+    other = hbytes(b'abcd')
+    s = Splice(buf, u, v, hbytes(r))
+    for t in (buf, other, Splice(buf, 0, 1)):
+        assert (s == t) == (s.buffer == materialise(t))
+        assert (s < t) == (s.buffer < materialise(t))
+        assert (s > t) == (s.buffer > materialise(t))
+
+
+def frozen_data(*blocks):
+    data = TestData.for_buffer(hbytes(b''.join(blocks)))
+    for b in blocks:
+        data.draw_bytes(len(b))
+    data.freeze()
+    return data
+
+
+def test_block_index_finds_duplicates():
+    index = BlockIndex(frozen_data(b'ab', b'c', b'ab', b'd', b'c', b'ab'))
+    assert sorted(index.duplicates()) == [b'ab', b'c']
+    assert index.positions[b'ab'] == [0, 3, 7]
+    assert index.replace([0, 3, 7], 2, b'xy') == b'xycxydcxy'
+
+
+def test_block_index_follows_same_shape_replacements():
+    data = frozen_data(b'ab', b'c', b'ab', b'xy')
+    index = BlockIndex(data)
+    new_data = frozen_data(b'aa', b'c', b'aa', b'xy')
+    index.update(new_data, [0, 3], b'ab', b'aa')
+    assert index.data is new_data
+    assert index.positions == BlockIndex(new_data).positions
+
+
+def test_block_index_merges_into_existing_blocks():
+    data = frozen_data(b'ab', b'ab', b'aa')
+    index = BlockIndex(data)
+    new_data = frozen_data(b'aa', b'aa', b'aa')
+    index.update(new_data, [0, 2], b'ab', b'aa')
+    assert index.positions == {b'aa': [0, 2, 4]}
+
+
+def test_block_index_ignores_data_of_a_different_shape():
+    data = frozen_data(b'ab', b'ab')
+    index = BlockIndex(data)
+    index.update(frozen_data(b'a', b'a', b'a'), [0, 2], b'ab', b'aa')
+    assert index.data is data
+
+
+def test_minimizing_duplicates_does_not_rebuild_the_index():
+    builds = []
+
+    class CountingIndex(BlockIndex):
+        def __init__(self, data):
+            builds.append(data)
+            super(CountingIndex, self).__init__(data)
+
+    def f(data):
+        x = data.draw_bytes(4)
+        for _ in range(20):
+            data.draw_bytes(1)
+            if data.draw_bytes(4) != x:
+                data.mark_invalid()
+        if int_from_bytes(x) >= 1000:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=5000, database=None,
+    ))
+    runner.last_data = TestData.for_buffer(
+        hbytes([255] * 4) + hbytes([7] + [255] * 4) * 20)
+    runner.test_function(runner.last_data)
+    assert runner.last_data.status == Status.INTERESTING
+
+    engine.BlockIndex = CountingIndex
+    try:
+        runner.minimize_duplicated_blocks()
+    finally:
+        engine.BlockIndex = BlockIndex
+    assert int_from_bytes(runner.last_data.buffer[:4]) == 1000
+    assert len(builds) <= 3
+
+
+def nested(data):
+    depth = 0
+    while True:
+        data.start_example()
+        if not data.draw_bytes(1)[0]:
+            break
+        depth += 1
+    value = data.draw_bytes(1)[0]
+    for _ in range(depth + 1):
+        data.stop_example()
+    return depth, value
+
+
+def nested_data(depth, value):
+    data = TestData.for_buffer(hbytes([1] * depth + [0, value]))
+    nested(data)
+    data.freeze()
+    return data
+
+
+def test_smallest_intervals_are_the_shortest_distinct_ones():
+    data = nested_data(100, 7)
+    smallest = smallest_intervals(data)
+    assert len(smallest) == REPLACEMENT_ALTERNATIVES
+    assert smallest[:3] == [hbytes([0]), hbytes([1]), hbytes([7])]
+    assert smallest[3:] == [hbytes([1] * k + [0, 7]) for k in range(5)]
+
+
+def test_replacement_index_offers_far_descendants_first():
+    data = nested_data(20, 7)
+    index = ReplacementIndex(data, 0, [])
+    groups = list(index.candidates(*data.intervals_by_level[0][0]))
+    # Our own level only has us in it, then the levels 16, 8, 4, 2 and 1
+    # below.
+    assert [len(g[0]) for g in groups] == [22, 6, 14, 18, 20, 21]
+
+
+def test_replaces_deeply_nested_examples_in_few_calls():
+    def f(data):
+        if nested(data)[1] == 7:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    runner.last_data = TestData.for_buffer(hbytes([1] * 500 + [0, 7]))
+    runner.test_function(runner.last_data)
+    calls = runner.iterations
+    runner.replace_intervals()
+    assert runner.last_data.buffer == hbytes([0, 7])
+    assert runner.iterations - calls <= 20
+
+
+def test_replacing_nested_examples_keeps_them_big_enough():
+    def f(data):
+        if nested(data)[0] >= 300:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None, timeout=-1))
+    runner.last_data = TestData.for_buffer(hbytes([1] * 1000 + [0, 0]))
+    runner.test_function(runner.last_data)
+    runner.replace_intervals()
+    assert runner.last_data.buffer == hbytes([1] * 300 + [0, 0])
+
+
+def test_does_not_replay_examples_known_to_be_valid():
+    key = b'key'
+    db = ExampleDatabase(':memory:')
+    for i in range(10):
+        db.save(key, hbytes([i]))
+
+    seen = []
+
+    def f(data):
+        seen.append(hbytes(data.draw_bytes(1)))
+
+    def run(digest):
+        del seen[:]
+        runner = TestRunner(f, settings=settings(
+            database=db, max_examples=100, cache_outcomes=True,
+            phases=[Phase.reuse],
+        ), database_key=key, test_digest=digest)
+        runner.run()
+        return set(seen)
+
+    first = run(b'digest')
+    assert len(first) == 10
+    assert not run(b'digest')
+    remaining = set(db.fetch(key))
+    assert run(b'changed') == remaining
+    assert all(
+        v.startswith(b'changed') for v in db.fetch(b'key.outcomes'))
+
+
+def test_does_not_cache_outcomes_unless_asked():
+    key = b'key'
+    db = ExampleDatabase(':memory:')
+    db.save(key, hbytes([1]))
+
+    def f(data):
+        data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        database=db, max_examples=1,
+    ), database_key=key, test_digest=b'digest')
+    runner.run()
+    assert not list(db.fetch(b'key.outcomes'))
+
+
+def test_running_isolated_reports_results_and_random_state():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 10:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    data = TestData.for_buffer(hbytes([10]))
+    results, failed, arcs, state, pool, index = runner._run_isolated(data)
+    assert data.status == Status.INTERESTING
+    assert results == data.results()
+    assert not failed
+    assert arcs is None
+    assert state == runner.random.getstate()
+    assert (pool, index) == (runner.entropy.pool, runner.entropy.index)
+
+
+def test_running_isolated_reports_errors():
+    def f(data):
+        data.draw_bytes(1)
+        raise ValueError()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    data = TestData.for_buffer(hbytes([0]))
+    _, failed, _, _, _, _ = runner._run_isolated(data)
+    assert failed
+    assert data.frozen
+
+
+def test_running_isolated_collects_coverage():
+    def f(data):
+        data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(database=None))
+    runner.collect_coverage = True
+    _, _, arcs, _, _, _ = runner._run_isolated(
+        TestData.for_buffer(hbytes([0])))
+    assert arcs
+
+
+@needs_fork
+def test_isolated_examples_do_not_share_state():
+    seen = []
+
+    def f(data):
+        seen.append(data.draw_bytes(1))
+        if len(seen) > 1:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=50, isolate_examples=True, database=None,
+    ))
+    runner.run()
+    assert runner.last_data.status == Status.VALID
+    assert runner.valid_examples == 50
+    assert not seen
+
+
+@needs_fork
+def test_isolated_examples_keep_generating_new_data():
+    def f(data):
+        data.draw_bytes(4)
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=20, isolate_examples=True, database=None,
+    ))
+    runner.run()
+    assert len(runner.tree.children[0]) >= 15
+
+
+@needs_fork
+def test_isolated_examples_shrink_and_replay_the_failure_here():
+    failures = []
+
+    def f(data):
+        x = data.draw_bytes(2)
+        if x[0] >= 10:
+            failures.append(x)
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=500, isolate_examples=True, database=None,
+    ))
+    runner.run()
+    assert runner.last_data.buffer == hbytes([10, 0])
+    assert failures == [hbytes([10, 0])]
+
+
+@needs_fork
+def test_reports_a_crash_in_an_isolated_example():
+    import os
+
+    def f(data):
+        if data.draw_bytes(1)[0] >= 128:
+            os._exit(3)
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=500, isolate_examples=True, database=None,
+    ))
+    with pytest.raises(AbnormalExit):
+        runner.run()
+
+
+@needs_fork
+def test_raises_errors_from_isolated_examples_here():
+    class Boom(Exception):
+        pass
+
+    def f(data):
+        data.draw_bytes(1)
+        raise Boom()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=10, isolate_examples=True, database=None,
+    ))
+    with pytest.raises(Boom):
+        runner.run()
+
+
+@needs_fork
+def test_given_reports_failures_from_isolated_examples():
+    @settings(isolate_examples=True, database=None)
+    @given(st.integers())
+    def test(i):
+        assert i < 10
+
+    with pytest.raises(AssertionError):
+        test()
+
+
+def test_runs_batches_of_examples_on_threads():
+    import threading
+    threads = Counter()
+
+    def f(data):
+        data.draw_bytes(2)
+        threads[threading.current_thread()] += 1
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=100, generate_threads=4, database=None,
+    ))
+    runner.run()
+    assert runner.valid_examples == 100
+    # New buffers after a run of mutations are still drawn one at a time.
+    assert threads.pop(threading.current_thread(), 0) < 20
+    assert 1 < len(threads) <= 4
+
+
+def test_threaded_runs_are_reproducible():
+    def run():
+        seen = []
+
+        def f(data):
+            x = data.draw_bytes(2)
+            time.sleep(0.0001 * (x[0] % 3))
+            seen.append(x)
+            if x[0] > 200 and x[1] > 200:
+                data.mark_interesting()
+
+        runner = TestRunner(f, settings=settings(
+            max_examples=200, generate_threads=8, database=None,
+        ), random=Random(0))
+        runner.run()
+        return sorted(seen), runner.last_data.buffer
+
+    assert run() == run()
+
+
+def test_finds_and_shrinks_failures_on_threads():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 10:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=1000, generate_threads=4, database=None,
+    ))
+    runner.run()
+    assert runner.last_data.buffer == hbytes([10])
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_batch_with_several_failures_in_it(seed):
+    def f(data):
+        x = data.draw_bytes(2)
+        if x[0] > 30 and x[1] > 30:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=1000, generate_threads=4, database=None,
+    ), random=Random(seed))
+    runner.run()
+    assert runner.last_data.buffer == hbytes([31, 31])
+
+
+def test_raises_errors_from_threads():
+    class Boom(Exception):
+        pass
+
+    def f(data):
+        data.draw_bytes(1)
+        raise Boom()
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=10, generate_threads=4, database=None,
+    ))
+    with pytest.raises(Boom):
+        runner.run()
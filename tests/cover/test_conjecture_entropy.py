@@ -0,0 +1,62 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from random import Random
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.engine import _draw_successor, \
+    _draw_predecessor
+from hypothesis.internal.conjecture.entropy import EntropyPool
+
+
+def test_same_seed_gives_same_bytes():
+    x = EntropyPool(Random(0), size=16)
+    y = EntropyPool(Random(0), size=16)
+    for n in [1, 5, 16, 3, 20, 7]:
+        assert x.draw(n) == y.draw(n)
+        assert x.byte() == y.byte()
+
+
+@given(st.integers(0, 100))
+def test_draws_the_requested_number_of_bytes(n):
+    pool = EntropyPool(Random(0), size=16)
+    assert len(pool.draw(n)) == n
+
+
+def test_below_covers_its_range():
+    pool = EntropyPool(Random(0))
+    assert set(pool.below(3) for _ in range(300)) == set([0, 1, 2])
+    assert set(pool.below(1) for _ in range(10)) == set([0])
+
+
+@given(st.binary(min_size=1))
+def test_draws_predecessor(xs):
+    xs = hbytes(xs)
+    r = _draw_predecessor(EntropyPool(Random(0)), xs)
+    assert len(r) == len(xs)
+    assert r <= xs
+
+
+@given(st.binary(min_size=1))
+def test_draws_successor(xs):
+    xs = hbytes(xs)
+    r = _draw_successor(EntropyPool(Random(0)), xs)
+    assert len(r) == len(xs)
+    assert r >= xs
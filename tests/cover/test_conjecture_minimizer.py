@@ -16,8 +16,9 @@
 
 from __future__ import division, print_function, absolute_import
 
-from hypothesis.internal.compat import hbytes
-from hypothesis.internal.conjecture.minimizer import minimize
+from hypothesis.internal.compat import hbytes, int_from_bytes
+from hypothesis.internal.conjecture import minimizer
+from hypothesis.internal.conjecture.minimizer import Minimizer, minimize
 
 
 def test_shrink_to_zero():
@@ -28,3 +29,57 @@ def test_shrink_to_smallest():
     assert minimize(
         hbytes([255] * 8), lambda x: sum(x) > 10
     ) == hbytes([0] * 7 + [11])
+
+
+def counting(condition):
+    calls = [0]
+
+    def accept(x):
+        calls[0] += 1
+        return condition(x)
+    return accept, calls
+
+
+def test_finds_integer_threshold_in_few_calls():
+    condition, calls = counting(
+        lambda x: int_from_bytes(x) >= 10 ** 9)
+    result = minimize(hbytes([255] * 8), condition)
+    assert int_from_bytes(result) == 10 ** 9
+    assert calls[0] <= 200
+
+
+def test_wide_block_threshold_in_few_calls():
+    condition, calls = counting(
+        lambda x: int_from_bytes(x) >= 2 ** 100 + 12345)
+    result = minimize(hbytes([255] * 16), condition)
+    assert int_from_bytes(result) == 2 ** 100 + 12345
+    assert calls[0] <= 250
+
+
+def test_byte_passes_still_run_for_non_monotonic_conditions():
+    assert minimize(
+        hbytes([255] * 4), lambda x: x[-1] == 7
+    ) == hbytes([0, 0, 0, 7])
+
+
+def test_does_not_ask_about_rejected_blocks_twice():
+    seen = []
+
+    def condition(x):
+        assert x not in seen
+        seen.append(x)
+        return x[0] + x[2] >= 100
+
+    m = Minimizer(hbytes([200, 3, 255, 17]), condition, None)
+    m.run()
+    assert m.current == hbytes([0, 0, 100, 0])
+    assert m.cache_misses == len(seen)
+    assert m.cache_hits > 0
+
+
+def test_rejected_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(minimizer, 'REJECTED_CACHE_SIZE', 10)
+    m = Minimizer(hbytes([255] * 4), lambda x: x[-1] == 7, None)
+    m.run()
+    assert m.current == hbytes([0, 0, 0, 7])
+    assert len(m.rejected) <= 10
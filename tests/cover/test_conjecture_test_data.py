@@ -16,12 +16,16 @@
 
 from __future__ import division, print_function, absolute_import
 
+from array import array
+
 import pytest
 
 from hypothesis import strategies as st
 from hypothesis import given
 from hypothesis.errors import Frozen
-from hypothesis.internal.conjecture.data import Status, StopTest, TestData
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.data import Status, StopTest, \
+    TestData, Intervals
 from hypothesis.searchstrategy.strategies import SearchStrategy
 
 
@@ -115,3 +119,104 @@ def test_does_not_double_freeze_in_interval_close():
         x.draw(BigStrategy())
     assert x.frozen
     assert len(x.intervals) == 0
+
+
+def test_derives_blocks_and_intervals_from_draws():
+    x = TestData.for_buffer(hbytes(6))
+    x.start_example()
+    x.draw_bytes(1)
+    x.start_example()
+    x.draw_bytes(2)
+    x.stop_example()
+    x.start_example()
+    x.draw_bytes(2)
+    x.stop_example()
+    x.stop_example()
+    x.draw_bytes(1)
+    x.freeze()
+    assert list(x.blocks) == [(0, 1), (1, 3), (3, 5), (5, 6)]
+    assert {
+        n: list(starts) for n, starts in x.block_starts.items()
+    } == {1: [0, 5], 2: [1, 3]}
+    assert [list(l) for l in x.intervals_by_level] == [
+        [(0, 5)], [(1, 3), (3, 5)]]
+    assert list(x.intervals) == [
+        (0, 5), (1, 5), (1, 3), (3, 5), (0, 1), (5, 6),
+    ]
+
+
+def test_block_starts_are_up_to_date_while_drawing():
+    x = TestData.for_buffer(hbytes(3))
+    x.draw_bytes(1)
+    assert list(x.block_starts[1]) == [0]
+    x.draw_bytes(2)
+    assert list(x.block_starts[1]) == [0]
+    assert list(x.block_starts[2]) == [1]
+
+
+def test_empty_examples_are_not_intervals():
+    x = TestData.for_buffer(hbytes(1))
+    x.start_example()
+    x.stop_example()
+    x.draw_bytes(1)
+    x.freeze()
+    assert x.intervals_by_level == []
+    assert list(x.intervals) == [(0, 1)]
+
+
+def test_intervals_behave_like_a_sequence_of_pairs():
+    x = Intervals(array('I', [0, 2, 1, 3, 5, 8]))
+    assert len(x) == 3
+    assert x[1] == (1, 3)
+    assert x[-1] == (5, 8)
+    assert x[1:] == [(1, 3), (5, 8)]
+    with pytest.raises(IndexError):
+        x[3]
+
+
+def test_replayed_buffer_is_prefix_of_source():
+    x = TestData.for_buffer(hbytes(b'abcdef'))
+    x.draw_bytes(2)
+    assert x.buffer == b'ab'
+    x.draw_bytes(1)
+    x.freeze()
+    assert x.buffer == b'abc'
+    assert isinstance(x.buffer, hbytes)
+
+
+def test_can_replay_from_a_bytearray():
+    source = bytearray(b'abc')
+    x = TestData.for_buffer(source)
+    assert x.draw_bytes(3) == b'abc'
+    x.freeze()
+    source.extend(b'def')
+
+
+def test_can_replay_without_a_memoryview(monkeypatch):
+    import hypothesis.internal.conjecture.data as data_module
+    monkeypatch.setattr(data_module, 'buffer_view', lambda buffer: buffer)
+    x = TestData.for_buffer(hbytes(b'abcdef'))
+    assert x.draw_bytes(2) == b'ab'
+    x.freeze()
+    assert x.buffer == b'ab'
+    assert isinstance(x.buffer, hbytes)
+
+
+def test_can_adopt_the_results_of_another_test_data():
+    source = TestData.for_buffer(hbytes(b'abcdef'))
+    source.start_example()
+    source.draw_bytes(2)
+    source.draw_bytes(1)
+    source.stop_example()
+    source.note(u'hi')
+    with pytest.raises(StopTest):
+        source.mark_interesting()
+
+    x = TestData(max_length=10, draw_bytes=lambda *args: None)
+    x.adopt_results(source.results())
+    assert x.frozen
+    assert x.status == Status.INTERESTING
+    assert x.buffer == b'abc'
+    assert x.output == u'hi'
+    assert list(x.blocks) == list(source.blocks)
+    assert list(x.intervals) == list(source.intervals)
@@ -0,0 +1,118 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import sys
+
+from hypothesis import strategies as st
+from hypothesis.internal.conjecture.data import TestData
+from hypothesis.internal.conjecture import tracer as tracer_module
+from hypothesis.internal.conjecture.tracer import Tracer, is_ignored
+
+
+def branches(x):
+    if x:
+        return 1
+    return 0
+
+
+def test_records_different_arcs_for_different_branches():
+    with Tracer() as true_tracer:
+        branches(True)
+    with Tracer() as false_tracer:
+        branches(False)
+    assert true_tracer.arcs
+    assert false_tracer.arcs
+    assert true_tracer.arcs != false_tracer.arcs
+
+
+def test_does_not_trace_hypothesis_itself():
+    data = TestData(max_length=100, draw_bytes=lambda data, n, d: b'\0' * n)
+    with Tracer() as tracer:
+        data.draw(st.integers())
+    assert all(
+        filename == __file__.replace('.pyc', '.py')
+        for filename, _, _ in tracer.arcs
+    )
+
+
+def test_restores_previous_trace_function():
+    previous = sys.gettrace()
+    with Tracer():
+        pass
+    assert sys.gettrace() is previous
+
+
+def test_traces_packages_installed_inside_the_standard_library(
+    monkeypatch
+):
+    lib = os.path.abspath(os.path.join(os.sep, 'python', 'lib'))
+    site = os.path.join(lib, 'site-packages')
+    monkeypatch.setattr(tracer_module, 'IGNORED_ROOTS', (
+        os.path.join(lib, ''),
+        os.path.join(site, 'hypothesis', ''),
+    ))
+    monkeypatch.setattr(tracer_module, 'TRACED_ROOTS', (
+        os.path.join(site, ''),
+    ))
+    assert is_ignored(os.path.join(lib, 'os.py'))
+    assert is_ignored(os.path.join(site, 'hypothesis', 'core.py'))
+    assert not is_ignored(os.path.join(site, 'hypothesis_foo', 'core.py'))
+    assert not is_ignored(os.path.join(site, 'mypackage', 'core.py'))
+    assert not is_ignored(os.path.join(os.sep, 'python', 'library.py'))
+
+
+def test_does_not_ignore_tests():
+    assert not is_ignored(__file__)
+
+
+class FakeCode(object):
+
+    def __init__(self, filename):
+        self.co_filename = filename
+
+
+class FakeFrame(object):
+
+    def __init__(self, filename, line=1):
+        self.f_code = FakeCode(filename)
+        self.f_lineno = line
+
+
+def test_records_arcs_between_lines_of_traced_calls():
+    filename = os.path.abspath('not_a_real_file.py')
+    tracer = Tracer()
+    trace_lines = tracer.trace(FakeFrame(filename), 'call', None)
+    for line in (3, 5):
+        assert trace_lines(
+            FakeFrame(filename, line), 'line', None) is trace_lines
+    assert trace_lines(FakeFrame(filename, 5), 'return', None) is trace_lines
+    assert tracer.arcs == set([(filename, -1, 3), (filename, 3, 5)])
+
+
+def test_only_traces_calls():
+    filename = os.path.abspath('not_a_real_file.py')
+    assert Tracer().trace(FakeFrame(filename), 'line', None) is None
+
+
+def test_does_not_trace_calls_into_ignored_files():
+    tracer = Tracer()
+    for _ in range(2):
+        assert tracer.trace(
+            FakeFrame(tracer_module.__file__), 'call', None) is None
+    assert not tracer.arcs
@@ -0,0 +1,129 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+from hypothesis import settings
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.data import Status, StopTest, TestData
+from hypothesis.internal.conjecture.tree import DataTree
+from hypothesis.internal.conjecture.engine import TestRunner
+
+
+def run_on(tree, f, buffer):
+    data = TestData.for_buffer(hbytes(buffer))
+    try:
+        f(data)
+    except StopTest:
+        pass
+    data.freeze()
+    tree.add(data)
+    return data
+
+
+def two_draws(data):
+    if data.draw_bytes(1)[0] == 0:
+        data.mark_invalid()
+    if data.draw_bytes(2)[0] == 255:
+        data.mark_interesting()
+
+
+def test_unknown_buffers_have_no_status():
+    tree = DataTree()
+    assert tree.lookup(hbytes([1, 2, 3])) is None
+    run_on(tree, two_draws, [1, 2, 3])
+    assert tree.lookup(hbytes([2, 2, 3])) is None
+
+
+def test_looks_up_statuses_of_seen_prefixes():
+    tree = DataTree()
+    run_on(tree, two_draws, [0])
+    run_on(tree, two_draws, [1, 255, 0])
+    run_on(tree, two_draws, [1, 0, 0])
+    assert tree.lookup(hbytes([0, 7, 7, 7])) == Status.INVALID
+    assert tree.lookup(hbytes([1, 255, 0])) == Status.INTERESTING
+    assert tree.lookup(hbytes([1, 0, 0, 9])) == Status.VALID
+
+
+def test_knows_short_buffers_overrun():
+    tree = DataTree()
+    run_on(tree, two_draws, [1, 0, 0])
+    assert tree.lookup(hbytes([1, 0])) == Status.OVERRUN
+    assert tree.lookup(hbytes([])) == Status.OVERRUN
+
+
+def test_records_size_of_overrunning_draw():
+    tree = DataTree()
+    data = run_on(tree, two_draws, [1])
+    assert data.status == Status.OVERRUN
+    assert tree.lookup(hbytes([1, 5])) == Status.OVERRUN
+
+
+def test_fully_explored_nodes_are_dead():
+    tree = DataTree()
+    for i in range(256):
+        run_on(tree, lambda data: data.draw_bytes(1), [i])
+    assert 0 in tree.dead
+
+
+def test_avoid_dead_skips_explored_blocks():
+    tree = DataTree()
+    for i in range(3):
+        run_on(tree, lambda data: data.draw_bytes(1), [i])
+    data = TestData(
+        max_length=1,
+        draw_bytes=tree.avoid_dead(lambda data, n, d: hbytes(n))
+    )
+    assert data.draw_bytes(1) == hbytes([3])
+
+
+def test_does_not_rerun_known_failures_when_shrinking():
+    seen = []
+
+    def f(data):
+        x = hbytes(data.draw_bytes(2))
+        seen.append(x)
+        if x[0] == 0:
+            data.mark_invalid()
+        if x[1] >= 100:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(database=None))
+    runner.run()
+    assert runner.last_data.buffer == hbytes([1, 100])
+    # The only repeat is the deliberate check for flakiness before shrinking.
+    assert len(seen) == len(set(seen)) + 1
+
+
+def test_stops_growing_at_max_nodes():
+    tree = DataTree(max_nodes=100)
+    for i in range(50):
+        run_on(tree, lambda data: [
+            data.draw_bytes(1) for _ in range(20)], [i] * 20)
+    assert len(tree.children) == 100
+    assert tree.lookup(hbytes([0] * 20)) == Status.VALID
+    assert tree.lookup(hbytes([49] * 20)) is None
+
+
+def test_runner_tree_is_bounded():
+    def f(data):
+        for _ in range(2000):
+            data.draw_bytes(1)
+
+    runner = TestRunner(f, settings=settings(
+        max_examples=100, database=None))
+    runner.run()
+    assert len(runner.tree.children) <= runner.tree.max_nodes
@@ -0,0 +1,113 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import signal
+import threading
+
+import pytest
+
+from hypothesis import given, settings
+from hypothesis.errors import InvalidArgument, DeadlineExceeded
+from hypothesis.strategies import integers
+from hypothesis.internal.deadline import deadline
+
+needs_timer = pytest.mark.skipif(
+    not hasattr(signal, 'setitimer'), reason='No interval timer')
+
+
+@needs_timer
+def test_interrupts_a_slow_example_and_shrinks_it():
+    @given(integers(0, 100))
+    @settings(deadline=50, database=None)
+    def test(i):
+        if i >= 10:
+            while True:
+                pass
+
+    with pytest.raises(DeadlineExceeded):
+        test()
+
+
+@needs_timer
+def test_does_not_fail_fast_examples():
+    @given(integers())
+    @settings(deadline=1000, database=None)
+    def test(i):
+        pass
+
+    test()
+
+
+@needs_timer
+def test_reports_the_smallest_slow_example(capsys):
+    @given(integers(0, 1000))
+    @settings(deadline=20, database=None)
+    def test(i):
+        if i >= 10:
+            time.sleep(1)
+
+    with pytest.raises(DeadlineExceeded):
+        test()
+    out, _ = capsys.readouterr()
+    assert 'test(i=10)' in out
+
+
+@needs_timer
+def test_restores_an_outer_timer():
+    fired = []
+
+    def handler(signum, frame):
+        fired.append(signum)
+
+    old = signal.signal(signal.SIGALRM, handler)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 0.2)
+        with deadline(1000):
+            pass
+        assert signal.getitimer(signal.ITIMER_REAL)[0] > 0
+        time.sleep(0.5)
+        assert fired
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old)
+
+
+def test_does_nothing_outside_the_main_thread():
+    result = []
+
+    def run():
+        with deadline(1):
+            time.sleep(0.01)
+        result.append(True)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert result
+
+
+@pytest.mark.parametrize('value', [0, -1, 'soon', True, False])
+def test_rejects_invalid_deadlines(value):
+    with pytest.raises(InvalidArgument):
+        settings(deadline=value)
+
+
+@pytest.mark.parametrize('value', [1, 0.5, 200])
+def test_accepts_positive_deadlines(value):
+    assert settings(deadline=value).deadline == value
@@ -0,0 +1,75 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import pytest
+
+from hypothesis import given, settings
+from hypothesis.errors import InvalidArgument, MemoryLimitExceeded
+from hypothesis.strategies import integers
+from hypothesis.internal.memory import memory_limit, tracemalloc
+
+needs_tracemalloc = pytest.mark.skipif(
+    tracemalloc is None, reason='No tracemalloc')
+
+
+@needs_tracemalloc
+def test_finds_the_smallest_example_over_the_limit(capsys):
+    @given(integers(0, 10 ** 6))
+    @settings(memory_limit=10 ** 5, database=None)
+    def test(n):
+        b'x' * (n * 1000)
+
+    with pytest.raises(MemoryLimitExceeded):
+        test()
+    out, _ = capsys.readouterr()
+    assert 'test(n=100)' in out
+
+
+@needs_tracemalloc
+def test_does_not_fail_examples_under_the_limit():
+    @given(integers(0, 100))
+    @settings(memory_limit=10 ** 6, database=None)
+    def test(n):
+        b'x' * n
+
+    test()
+
+
+@needs_tracemalloc
+def test_only_counts_memory_allocated_by_the_example():
+    held = [b'x' * 10 ** 6]
+    with memory_limit(10 ** 5):
+        held.append(b'y' * 10 ** 4)
+    assert not tracemalloc.is_tracing()
+
+
+@needs_tracemalloc
+def test_leaves_existing_tracing_on():
+    tracemalloc.start()
+    try:
+        with memory_limit(10 ** 5):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('value', [0, -1, 1.5, 'lots', True])
+def test_rejects_invalid_memory_limits(value):
+    with pytest.raises(InvalidArgument):
+        settings(memory_limit=value)
@@ -22,8 +22,9 @@ from collections import namedtuple
 import pytest
 
 from hypothesis.types import RandomWithSeed
-from hypothesis.errors import NoExamples
-from hypothesis.strategies import just, tuples, randoms, booleans, integers
+from hypothesis.errors import NoExamples, InvalidArgument
+from hypothesis.strategies import just, lists, tuples, randoms, booleans, \
+    integers
 from hypothesis.internal.compat import text_type
 from hypothesis.searchstrategy.strategies import one_of_strategies
 
@@ -95,3 +96,36 @@ def test_can_map_nameless():
 def test_can_flatmap_nameless():
     f = nameless_const(just(3))
     assert repr(f) in repr(integers().flatmap(f))
+
+
+def test_stream_yields_n_values():
+    values = list(integers().stream(n=100))
+    assert len(values) == 100
+    assert all(isinstance(v, int) for v in values)
+
+
+def test_stream_is_reproducible_from_a_seed():
+    s = lists(integers())
+    assert list(s.stream(seed=1, n=50)) == list(s.stream(seed=1, n=50))
+    assert list(s.stream(seed=1, n=50)) != list(s.stream(seed=2, n=50))
+
+
+def test_stream_goes_on_until_you_stop():
+    stream = booleans().stream()
+    assert len([next(stream) for _ in range(1000)]) == 1000
+
+
+def test_stream_skips_rejected_values():
+    values = list(integers().filter(lambda x: x % 2 == 0).stream(n=50))
+    assert len(values) == 50
+    assert all(v % 2 == 0 for v in values)
+
+
+def test_stream_raises_when_too_filtered():
+    with pytest.raises(NoExamples):
+        next(integers().filter(lambda x: False).stream())
+
+
+def test_stream_rejects_negative_counts():
+    with pytest.raises(InvalidArgument):
+        integers().stream(n=-1)
@@ -162,3 +162,21 @@ def test_load_non_existent_profile():
 def test_runs_tests_with_defaults_from_conftest():
     assert settings.default.strict
     assert settings.default.timeout == -1
+
+
+@pytest.mark.parametrize('name', [
+    'generate_processes', 'generate_threads', 'shrink_processes',
+    'concurrent_examples',
+])
+@pytest.mark.parametrize('value', [0, -1, 1.5, True, '2'])
+def test_rejects_invalid_worker_counts(name, value):
+    with pytest.raises(InvalidArgument):
+        settings(**{name: value})
+
+
+@pytest.mark.parametrize('name', [
+    'generate_processes', 'generate_threads', 'shrink_processes',
+    'concurrent_examples',
+])
+def test_accepts_positive_worker_counts(name):
+    assert getattr(settings(**{name: 3}), name) == 3
@@ -16,8 +16,17 @@
 
 from __future__ import division, print_function, absolute_import
 
+import time
+
+import pytest
+
 import hypothesis.strategies as st
-from hypothesis import find, settings
+from hypothesis import find, given, settings
+from hypothesis.errors import InvalidArgument
+from tests.common.utils import capture_out
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.data import Status
+from hypothesis.internal.conjecture.engine import TestRunner
 
 
 def test_max_shrinks():
@@ -32,3 +41,76 @@ def test_max_shrinks():
         settings=settings(max_shrinks=1)
     )
     assert len(seen) == 2
+
+
+def test_reports_that_shrinking_was_cut_short():
+    @given(st.binary(min_size=100, max_size=100))
+    @settings(max_shrink_calls=10, database=None)
+    def test(s):
+        assert sum(s) < 1000
+
+    with capture_out() as out:
+        with pytest.raises(AssertionError):
+            test()
+    assert 'Shrinking was cut short' in out.getvalue()
+    assert 'Falsifying example' in out.getvalue()
+
+
+def test_shrinking_counts_calls_from_the_start_of_shrinking():
+    def f(data):
+        if sum(data.draw_bytes(100)) >= 1000:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_shrink_calls=10, database=None,
+    ))
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+    assert runner.shrink_cut_short
+    assert runner.iterations - runner.shrink_start_iterations == 10
+
+
+def test_shrink_time_limit_stops_shrinking():
+    def f(data):
+        if sum(data.draw_bytes(100)) >= 1000:
+            if runner.shrink_start_time is not None:
+                time.sleep(0.01)
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        shrink_time_limit=0.1, database=None,
+    ))
+    start = time.time()
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+    assert runner.shrink_cut_short
+    assert time.time() - start < 5
+
+
+def test_shrinking_within_budget_is_not_cut_short():
+    def f(data):
+        if data.draw_bytes(1)[0] >= 10:
+            data.mark_interesting()
+
+    runner = TestRunner(f, settings=settings(
+        max_shrink_calls=1000, shrink_time_limit=60, database=None,
+    ))
+    runner.run()
+    assert runner.last_data.buffer == hbytes([10])
+    assert not runner.shrink_cut_short
+
+
+@pytest.mark.parametrize('name, value', [
+    ('max_shrink_calls', 0), ('max_shrink_calls', 1.5),
+    ('max_shrink_calls', True), ('shrink_time_limit', -1),
+    ('shrink_time_limit', 0), ('shrink_time_limit', 'soon'),
+    ('shrink_time_limit', True),
+])
+def test_rejects_invalid_shrink_budgets(name, value):
+    with pytest.raises(InvalidArgument):
+        settings(**{name: value})
+
+
+@pytest.mark.parametrize('value', [1, 0.5, 60])
+def test_accepts_positive_shrink_time_limits(value):
+    assert settings(shrink_time_limit=value).shrink_time_limit == value
@@ -0,0 +1,92 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import os
+import json
+
+from hypothesis import settings
+from hypothesis.statistics import with_collector, statistics_file
+from hypothesis.internal.compat import hbytes
+from hypothesis.internal.conjecture.data import Status
+from hypothesis.internal.conjecture.engine import TestRunner
+
+
+def sum_at_least_500(data):
+    if sum(hbytes(data.draw_bytes(20))) >= 500:
+        data.mark_interesting()
+
+
+def test_counts_calls_and_shrinks_per_pass():
+    runner = TestRunner(sum_at_least_500, settings=settings(database=None))
+    runner.run()
+    assert runner.last_data.status == Status.INTERESTING
+    stats = runner.statistics
+    assert stats.shrinks == runner.shrinks
+    names = [p.name for p in stats.shrink_passes]
+    assert names[0] == 'delete_random_intervals'
+    assert 'minimize_individual_blocks' in names
+    assert sum(p.shrinks for p in stats.shrink_passes) == runner.shrinks
+    assert sum(p.calls for p in stats.shrink_passes) < runner.iterations
+    assert sum(p.bytes_saved for p in stats.shrink_passes) == (
+        20 - len(runner.last_data.buffer))
+    assert all(p.runtime >= 0 for p in stats.shrink_passes)
+
+
+def test_counts_minimizer_cache_hits_per_pass():
+    runner = TestRunner(sum_at_least_500, settings=settings(database=None))
+    runner.run()
+    stats = runner.statistics
+    blocks = [
+        p for p in stats.shrink_passes
+        if p.name == 'minimize_individual_blocks'][0]
+    assert blocks.minimizer_cache_hits > 0
+    assert blocks.minimizer_cache_misses > 0
+    assert sum(p.minimizer_cache_hits for p in stats.shrink_passes) == (
+        runner.minimizer_cache_hits)
+    assert blocks.as_dict()['minimizer_cache_hits'] == (
+        blocks.minimizer_cache_hits)
+
+
+def test_passes_statistics_to_collector():
+    collected = []
+    with with_collector(collected.append):
+        runner = TestRunner(
+            sum_at_least_500, settings=settings(database=None))
+        runner.run()
+    assert len(collected) == 1
+    assert collected[0].iterations == runner.iterations
+
+
+def test_does_not_need_a_collector():
+    runner = TestRunner(sum_at_least_500, settings=settings(database=None))
+    runner.run()
+
+
+def test_can_write_statistics_as_json():
+    key = b'statistics test'
+    if os.path.exists(statistics_file(key)):
+        os.unlink(statistics_file(key))
+    runner = TestRunner(
+        sum_at_least_500,
+        settings=settings(database=None, record_statistics=True),
+        database_key=key,
+    )
+    runner.run()
+    with open(statistics_file(key)) as i:
+        written = json.load(i)
+    assert written == runner.statistics.as_dict()
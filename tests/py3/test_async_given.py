@@ -0,0 +1,227 @@
+# coding=utf-8
+#
+# This file is part of Hypothesis (https://github.com/DRMacIver/hypothesis)
+#
+# Most of this work is copyright (C) 2013-2015 David R. MacIver
+# (david@drmaciver.com), but it contains contributions by others. See
+# https://github.com/DRMacIver/hypothesis/blob/master/CONTRIBUTING.rst for a
+# full list of people who may hold copyright, and consult the git log if you
+# need to determine who owns an individual contribution.
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# END HEADER
+
+from __future__ import division, print_function, absolute_import
+
+import time
+import asyncio
+from unittest import TestCase
+
+import pytest
+
+import hypothesis.strategies as st
+from hypothesis import given, assume, batched, settings
+from hypothesis.errors import InvalidArgument, DeadlineExceeded, \
+    FailedHealthCheck
+
+
+def test_runs_async_tests_on_one_event_loop():
+    loops = set()
+
+    @given(st.integers())
+    @settings(database=None)
+    async def test(i):
+        await asyncio.sleep(0)
+        loops.add(id(asyncio.get_event_loop()))
+
+    test()
+    assert len(loops) == 1
+
+
+def test_finds_and_shrinks_failures_in_async_tests(capsys):
+    @given(st.integers(0, 1000))
+    @settings(database=None)
+    async def test(i):
+        await asyncio.sleep(0)
+        assert i < 10
+
+    with pytest.raises(AssertionError):
+        test()
+    out, _ = capsys.readouterr()
+    assert 'test(i=10)' in out
+
+
+def test_respects_assumptions_in_async_tests():
+    @given(st.integers())
+    @settings(database=None)
+    async def test(i):
+        assume(i % 2 == 0)
+        assert i % 2 == 0
+
+    test()
+
+
+def test_runs_examples_concurrently():
+    running = [0]
+    most = [0]
+
+    @given(st.integers())
+    @settings(concurrent_examples=10, max_examples=100, database=None)
+    async def test(i):
+        running[0] += 1
+        most[0] = max(most[0], running[0])
+        await asyncio.sleep(0.001)
+        running[0] -= 1
+
+    test()
+    assert most[0] == 10
+
+
+def test_concurrent_examples_are_faster_for_waiting_tests():
+    def run(concurrency):
+        @given(st.integers())
+        @settings(
+            concurrent_examples=concurrency, max_examples=100,
+            perform_health_check=False, database=None,
+        )
+        async def test(i):
+            await asyncio.sleep(0.01)
+
+        start = time.time()
+        test()
+        return time.time() - start
+
+    assert run(20) * 4 < run(1)
+
+
+def test_finds_and_shrinks_failures_from_concurrent_examples(capsys):
+    @given(st.integers(0, 1000))
+    @settings(concurrent_examples=10, database=None)
+    async def test(i):
+        await asyncio.sleep(0)
+        assume(i != 3)
+        assert i < 10
+
+    with pytest.raises(AssertionError):
+        test()
+    out, _ = capsys.readouterr()
+    assert 'test(i=10)' in out
+
+
+def test_cancels_async_examples_that_overrun_the_deadline():
+    cancelled = []
+
+    @given(st.integers(0, 10))
+    @settings(deadline=20, database=None)
+    async def test(i):
+        try:
+            await asyncio.sleep(i / 10)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+
+    with pytest.raises(DeadlineExceeded):
+        test()
+    assert cancelled
+
+
+def test_concurrent_examples_still_have_a_deadline():
+    @given(st.integers(0, 100))
+    @settings(concurrent_examples=10, deadline=20, database=None)
+    async def test(x):
+        if x >= 50:
+            await asyncio.sleep(0.05)
+
+    with pytest.raises(DeadlineExceeded):
+        test()
+
+
+def test_runs_examples_one_at_a_time_when_there_is_a_deadline():
+    running = [0]
+    most = [0]
+
+    @given(st.integers())
+    @settings(
+        concurrent_examples=10, max_examples=50, deadline=1000,
+        database=None,
+    )
+    async def test(i):
+        running[0] += 1
+        most[0] = max(most[0], running[0])
+        await asyncio.sleep(0.001)
+        running[0] -= 1
+
+    test()
+    assert most[0] == 1
+
+
+def test_checks_return_values_of_concurrent_examples():
+    running = [0]
+
+    @given(st.integers())
+    @settings(concurrent_examples=10, database=None)
+    async def test(i):
+        running[0] += 1
+        await asyncio.sleep(0.001)
+        concurrent = running[0] > 1
+        running[0] -= 1
+        if concurrent:
+            return i
+
+    with pytest.raises(FailedHealthCheck):
+        test()
+
+
+def test_reports_errors_drawing_concurrent_examples():
+    @given(st.integers(0, 100).map(lambda x: 1 // (x % 10)))
+    @settings(
+        concurrent_examples=10, perform_health_check=False, database=None)
+    async def test(x):
+        pass
+
+    with pytest.raises(ZeroDivisionError):
+        test()
+
+
+def test_respects_assumptions_in_concurrent_examples():
+    @given(st.integers())
+    @settings(concurrent_examples=10, database=None)
+    async def test(i):
+        await asyncio.sleep(0)
+        assume(i % 2 == 0)
+        assert i % 2 == 0
+
+    test()
+
+
+def test_cannot_batch_async_tests():
+    @given(st.integers())
+    @batched(10)
+    async def test(xs):
+        pass
+
+    with pytest.raises(InvalidArgument):
+        test()
+
+
+class TestCustomEventLoop(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def execute_example(self, f):
+        result = f()
+        if asyncio.iscoroutine(result):
+            result = self.loop.run_until_complete(result)
+        return result
+
+    @given(st.integers())
+    @settings(concurrent_examples=10, database=None)
+    async def test_runs_on_the_executors_loop(self, i):
+        assert asyncio.get_event_loop() is self.loop